@@ -0,0 +1,354 @@
+"""
+Local Analysis Service with Warm In-Memory State
+Loads the dataset and derived variables once, keeps fitted regressions and
+ADF results cached in memory and answers queries over HTTP in milliseconds
+instead of re-running heckscher_ohlin_analysis.py for every question.
+
+Endpoints (GET, JSON responses; start/end are optional inclusive years):
+    /health                               rows, year range, last refresh
+    /series?name=Capital_Labor_Ratio&start=1990&end=2000
+    /kl?start=1990&end=2000               shorthand for the K/L ratio
+    /regression?start=1980&end=2019       Real Exports on K/L for a subsample
+    /adf?series=Real_Exports&start=1960   Augmented Dickey-Fuller test
+    POST /refresh                         fetch new FRED data now
+
+A background thread refreshes the data periodically. Only the last years are
+downloaded again; changed or new rows are merged in and the caches dropped.
+
+Usage:
+    python analysis_service.py --port 8765 --refresh-interval 3600
+    curl "http://127.0.0.1:8765/regression?start=1980&end=2019"
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import statsmodels.api as sm
+from statsmodels.tsa.stattools import adfuller
+
+from excel_layout import regression_tables
+from heckscher_ohlin_analysis import (
+    FRED_BASE_URL,
+    calculate_variables,
+    download_fred_data,
+)
+
+SERIES = [
+    "Real_GDP",
+    "Labor_Force",
+    "Real_Investment",
+    "Real_Exports",
+    "Capital_Deepening_Pct",
+    "Capital_Labor_Ratio",
+]
+
+# Years re-downloaded on refresh, so revisions to recent data are picked up
+REFRESH_OVERLAP_YEARS = 2
+
+
+class RequestError(ValueError):
+    """A query the service cannot answer; reported as HTTP 400."""
+
+
+def _records(frame):
+    """DataFrame rows as JSON-safe dicts (NaN -> null)."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict(orient="records")
+
+
+def _clean(value):
+    """A float for JSON, with NaN/inf mapped to None."""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+class AnalysisState:
+    """
+    The analysis frame plus caches of fitted models and test results.
+
+    The frame is replaced as a whole on refresh. Queries take the frame,
+    its version and the caches together under the lock, fit outside it and
+    only cache a result if the version is still current, so a result
+    computed on replaced data never enters the new caches.
+    """
+
+    def __init__(self, df, base_url=FRED_BASE_URL):
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._set_frame(df)
+
+    def _set_frame(self, df):
+        with self._lock:
+            self.df = df.sort_index()
+            self.version = getattr(self, "version", 0) + 1
+            self.refreshed = datetime.now(timezone.utc)
+            self._regressions = {}
+            self._adf = {}
+
+    @classmethod
+    def load(cls, csv_path="heckscher_ohlin_data.csv", base_url=FRED_BASE_URL):
+        """Start from the saved CSV when present, otherwise download."""
+        if csv_path and os.path.exists(csv_path):
+            df = pd.read_csv(csv_path, index_col="Year")
+            print(f"✓ Loaded {len(df)} years from {csv_path}")
+        else:
+            raw = download_fred_data(start_date="1960-01-01", base_url=base_url)
+            df = calculate_variables(raw)
+        return cls(df, base_url)
+
+    def _snapshot(self):
+        """The frame, its version and its caches, taken together."""
+        with self._lock:
+            return self.df, self.version, self._regressions, self._adf
+
+    def _store(self, version, cache, key, result):
+        """Cache result unless the data was replaced while computing it."""
+        with self._lock:
+            if self.version == version:
+                cache[key] = result
+
+    def subsample(self, start=None, end=None, df=None):
+        if df is None:
+            df = self.df
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index <= end]
+        if df.empty:
+            raise RequestError(f"No data between {start} and {end}")
+        return df
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def health(self):
+        with self._lock:
+            return {
+                "status": "ok",
+                "rows": len(self.df),
+                "first_year": int(self.df.index.min()),
+                "last_year": int(self.df.index.max()),
+                "version": self.version,
+                "refreshed": self.refreshed.isoformat(timespec="seconds"),
+            }
+
+    def series(self, name, start=None, end=None):
+        if name not in SERIES:
+            raise RequestError(f"Unknown series '{name}'; choose from {SERIES}")
+        values = self.subsample(start, end)[[name]].reset_index()
+        return {"series": name, "observations": _records(values)}
+
+    def regression(self, start=None, end=None):
+        """Real Exports on the K/L ratio for the given years (cached)."""
+        key = (start, end)
+        df, version, cache, _ = self._snapshot()
+        result = cache.get(key)
+        if result is None:
+            data = self.subsample(start, end, df)[
+                ["Real_Exports", "Capital_Labor_Ratio"]
+            ].dropna()
+            if len(data) < 3:
+                raise RequestError("A regression needs at least 3 complete years")
+            model = sm.OLS(
+                data["Real_Exports"], sm.add_constant(data["Capital_Labor_Ratio"])
+            ).fit()
+            coefficients, fit = regression_tables(model)
+            result = {
+                "first_year": int(data.index.min()),
+                "last_year": int(data.index.max()),
+                "coefficients": _records(coefficients),
+                "fit": dict(zip(fit["Statistic"], map(_clean, fit["Value"]))),
+            }
+            self._store(version, cache, key, result)
+        return result
+
+    def adf(self, series, start=None, end=None):
+        """Augmented Dickey-Fuller test with AIC lag selection (cached)."""
+        if series not in SERIES:
+            raise RequestError(f"Unknown series '{series}'; choose from {SERIES}")
+        key = (series, start, end)
+        df, version, _, cache = self._snapshot()
+        result = cache.get(key)
+        if result is None:
+            values = self.subsample(start, end, df)[series].dropna()
+            if len(values) < 10:
+                raise RequestError("An ADF test needs at least 10 observations")
+            statistic, p_value, lags, nobs, critical, _ = adfuller(
+                values, autolag="AIC"
+            )
+            result = {
+                "series": series,
+                "adf_statistic": _clean(statistic),
+                "p_value": _clean(p_value),
+                "lags": int(lags),
+                "observations": int(nobs),
+                "critical_values": {k: _clean(v) for k, v in critical.items()},
+                "stationary": bool(p_value < 0.05),
+            }
+            self._store(version, cache, key, result)
+        return result
+
+    # -------------------------------------------------------------------------
+    # Refresh
+    # -------------------------------------------------------------------------
+
+    def refresh(self):
+        """
+        Download the most recent years and merge changed or new rows.
+
+        Returns the number of rows that changed. When the download falls back
+        to the bundled sample data (e.g. offline), the current data is kept.
+        """
+        last_year = int(self.df.index.max())
+        first_year = last_year - REFRESH_OVERLAP_YEARS + 1
+        raw = download_fred_data(
+            start_date=f"{first_year}-01-01", base_url=self.base_url
+        )
+        if raw is None or raw.empty or raw.index.min() < first_year:
+            print("  ✗ Refresh skipped: no fresh FRED data")
+            return 0
+
+        updates = calculate_variables(raw)[list(self.df.columns)]
+        current = self.df.reindex(updates.index)
+        changed = ~((updates == current) | (updates.isna() & current.isna())).all(
+            axis=1
+        )
+        if not changed.any():
+            print("  ✓ Refresh: data unchanged")
+            return 0
+
+        merged = updates[changed].combine_first(self.df)
+        self._set_frame(merged)
+        print(f"  ✓ Refresh: {int(changed.sum())} years updated")
+        return int(changed.sum())
+
+    def start_background_refresh(self, interval):
+        """Refresh every interval seconds in a daemon thread."""
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"  ✗ Refresh failed: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+
+# =============================================================================
+# HTTP Interface
+# =============================================================================
+
+
+def _year(query, name):
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return int(values[0])
+    except ValueError:
+        raise RequestError(f"'{name}' must be a year, got '{values[0]}'")
+
+
+def make_handler(state):
+    """Request handler class bound to an AnalysisState."""
+
+    routes = {
+        "/health": lambda q: state.health(),
+        "/series": lambda q: state.series(
+            q.get("name", [""])[0], _year(q, "start"), _year(q, "end")
+        ),
+        "/kl": lambda q: state.series(
+            "Capital_Labor_Ratio", _year(q, "start"), _year(q, "end")
+        ),
+        "/regression": lambda q: state.regression(_year(q, "start"), _year(q, "end")),
+        "/adf": lambda q: state.adf(
+            q.get("series", [""])[0], _year(q, "start"), _year(q, "end")
+        ),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = routes.get(url.path)
+            if route is None:
+                self._send(404, {"error": f"Unknown endpoint {url.path}"})
+                return
+            self._respond(lambda: route(parse_qs(url.query)))
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/refresh":
+                self._send(404, {"error": f"Unknown endpoint {self.path}"})
+                return
+            self._respond(lambda: {"changed_rows": state.refresh(), **state.health()})
+
+        def _respond(self, compute):
+            """Send compute() as JSON; bad requests get 400, failures 500."""
+            try:
+                body = compute()
+            except RequestError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                print(f"  ✗ {self.command} {self.path} failed: {e!r}")
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self._send(200, body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(state, host="127.0.0.1", port=8765, refresh_interval=3600):
+    """Serve state over HTTP until interrupted."""
+    if refresh_interval:
+        state.start_background_refresh(refresh_interval)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    print(f"✓ Serving {len(state.df)} years on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--csv", default="heckscher_ohlin_data.csv")
+    parser.add_argument("--fred-url", default=FRED_BASE_URL)
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=3600,
+        help="seconds between background refreshes (0 disables)",
+    )
+    args = parser.parse_args()
+
+    state = AnalysisState.load(args.csv, args.fred_url)
+    serve(state, args.host, args.port, args.refresh_interval)
@@ -0,0 +1,121 @@
+"""
+Generate One Excel Workbook per Entity from a Panel
+Splits a panel (one row per entity and year) by its entity column and writes
+each entity's workbook - Data, Dual-Axis Chart, Regression Plot and Summary
+sheets - in parallel worker processes using the xlsxwriter exporter.
+
+A manifest CSV records the output path, row count and export time of every
+workbook.
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from create_excel_charts_v2 import export_workbook
+
+MANIFEST_COLUMNS = ["Entity", "Output_File", "Rows", "Seconds"]
+
+
+def _workbook_name(entity):
+    """File name for an entity's workbook, safe on every platform."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", str(entity)).strip("_")
+    return f"heckscher_ohlin_{slug or 'entity'}.xlsx"
+
+
+def _export_entity(entity, frame, output_file, constant_memory):
+    """Worker: export one entity's workbook and time it."""
+    start = time.perf_counter()
+    export_workbook(
+        frame,
+        output_file,
+        constant_memory=constant_memory,
+        entity_name=str(entity),
+        verbose=False,
+    )
+    return {
+        "Entity": entity,
+        "Output_File": output_file,
+        "Rows": len(frame),
+        "Seconds": time.perf_counter() - start,
+    }
+
+
+def export_entity_workbooks(
+    panel,
+    entity_col="Entity",
+    output_dir="workbooks",
+    max_workers=None,
+    constant_memory=False,
+    manifest_file="manifest.csv",
+):
+    """
+    Write one workbook per entity of panel in a process pool.
+
+    panel needs entity_col, Year and the Data sheet variables; Year may also
+    be the index. Returns the manifest as a DataFrame and writes it to
+    output_dir/manifest_file (skipped when manifest_file is None).
+    """
+    if "Year" not in panel.columns:
+        panel = panel.reset_index()
+
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Exporting {panel[entity_col].nunique()} workbooks to {output_dir}/")
+
+    records = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _export_entity,
+                entity,
+                frame.sort_values("Year").drop(columns=entity_col),
+                os.path.join(output_dir, _workbook_name(entity)),
+                constant_memory,
+            )
+            for entity, frame in panel.groupby(entity_col, sort=True)
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            print(
+                f"  ✓ {record['Entity']}: {record['Rows']} rows "
+                f"in {record['Seconds']:.2f}s"
+            )
+
+    manifest = (
+        pd.DataFrame(records, columns=MANIFEST_COLUMNS)
+        .sort_values("Entity")
+        .reset_index(drop=True)
+    )
+    if manifest_file is not None:
+        manifest_path = os.path.join(output_dir, manifest_file)
+        manifest.to_csv(manifest_path, index=False)
+        print(f"\n✓ Manifest saved: {manifest_path}")
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("panel_csv", help="panel CSV with an entity column")
+    parser.add_argument("--entity-col", default="Entity")
+    parser.add_argument("--output-dir", default="workbooks")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--constant-memory",
+        action="store_true",
+        help="stream rows to disk instead of holding each workbook in memory",
+    )
+    args = parser.parse_args()
+
+    export_entity_workbooks(
+        pd.read_csv(args.panel_csv),
+        entity_col=args.entity_col,
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+        constant_memory=args.constant_memory,
+    )
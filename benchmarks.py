@@ -0,0 +1,486 @@
+"""
+Benchmark Suite for the Heckscher-Ohlin Pipeline
+Times every pipeline function at several data scales - from the real 65-row
+annual dataset up to synthetic million-row panels - and stores the results
+so slowdowns between versions can be spotted.
+
+Benchmarks:
+- download_fred_data       against a local stand-in for the FRED CSV endpoint
+- calculate_variables
+- create_dual_axis_chart   including the 300 dpi PNG export
+- run_regression_analysis  OLS fit, summary and regression plot
+- test_stationarity        ADF tests
+- excel_openpyxl           create_excel_charts.export_workbook
+- excel_xlsxwriter         create_excel_charts_v2.export_workbook
+- markdown_to_docx         a report with a table of the given number of rows
+
+Each run is written to benchmark_results/<timestamp>.json and compared with
+the previous run; benchmarks whose median time grew by more than the
+threshold are reported as regressions (exit status 1).
+
+Usage:
+    python benchmarks.py                        # default scales
+    python benchmarks.py --scales 65 10000 --only calculate_variables
+    python benchmarks.py --compare benchmark_results/baseline.json
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import matplotlib
+
+matplotlib.use("Agg")
+# Panels plotted as one line exceed Agg's path limit at a million points
+matplotlib.rcParams["agg.path.chunksize"] = 10_000
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import create_excel_charts
+import create_excel_charts_v2
+from convert_to_docx import markdown_to_docx
+from heckscher_ohlin_analysis import (
+    calculate_variables,
+    create_dual_axis_chart,
+    create_sample_data,
+    download_fred_data,
+    run_regression_analysis,
+    test_stationarity,
+)
+
+DEFAULT_SCALES = [65, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = "benchmark_results"
+REGRESSION_THRESHOLD = 1.25
+
+FRED_SERIES = {
+    "GDPC1": "Real_GDP",
+    "CLF16OV": "Labor_Force",
+    "GPDIC1": "Real_Investment",
+    "EXPGSC1": "Real_Exports",
+}
+
+# =============================================================================
+# Synthetic Data
+# =============================================================================
+
+
+def synthetic_panel(n_rows, seed=0):
+    """
+    Raw input data (the four FRED series) with n_rows rows.
+
+    65 rows is the real annual dataset. Larger sizes are panels of entities
+    with 65 years each, built by scaling the real series with random noise so
+    every value stays in a realistic range. Year is the index and an Entity
+    column identifies the panel member.
+    """
+    base = create_sample_data_quiet()
+    if n_rows == len(base):
+        return base
+
+    rng = np.random.default_rng(seed)
+    n_years = len(base)
+    positions = np.arange(n_rows) % n_years
+    entities = np.arange(n_rows) // n_years
+    scale = rng.uniform(0.5, 1.5, size=entities[-1] + 1)[entities]
+    panel = pd.DataFrame(
+        {
+            column: base[column].to_numpy()[positions]
+            * scale
+            * rng.normal(1.0, 0.02, n_rows)
+            for column in FRED_SERIES.values()
+        },
+        index=pd.Index(base.index.to_numpy()[positions], name="Year"),
+    )
+    panel.insert(0, "Entity", entities)
+    return panel
+
+
+def create_sample_data_quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_sample_data()
+
+
+def analysis_frame(n_rows):
+    """Synthetic data with the derived variables already computed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return calculate_variables(synthetic_panel(n_rows))
+
+
+def synthetic_markdown(n_rows):
+    """A report shaped like assignment_answers.md with an n_rows-row table."""
+    df = analysis_frame(min(n_rows, 65)).reset_index()
+    repeats = -(-n_rows // len(df))
+    values = np.tile(
+        df[["Year", "Real_GDP", "Capital_Labor_Ratio"]].to_numpy(), (repeats, 1)
+    )
+    lines = [
+        "# Heckscher-Ohlin Benchmark Report",
+        "",
+        "## Summary",
+        "",
+        "Capital deepening is **investment as a share of GDP** and the "
+        "*capital-labor ratio* is $K/L$ in dollars per worker.",
+        "",
+        "- First point with `code`",
+        "- Second point",
+        "",
+        "## Data",
+        "",
+        "| Year | Real GDP | K/L |",
+        "|------|----------|-----|",
+    ]
+    lines += [
+        f"| {int(year)} | {gdp:,.1f} | **{ratio:,.0f}** |"
+        for year, gdp, ratio in values[:n_rows].tolist()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# Local FRED Stand-In
+# =============================================================================
+
+
+class FredStandIn:
+    """
+    Serves /graph/fredgraph.csv like FRED does, from pregenerated CSVs.
+
+    Each series has n_rows observations spread evenly over 1960-2024, so the
+    annual data download_fred_data derives is always 65 years while the
+    amount of CSV to fetch and parse grows with n_rows. The cosd/coed date
+    range of a request is honoured. data replaces the bundled sample values
+    (annual, Year index, one column per FRED_SERIES name).
+    """
+
+    def __init__(self, n_rows, data=None):
+        dates = pd.date_range("1960-01-01", "2024-12-31", periods=n_rows)
+        base = create_sample_data_quiet() if data is None else data
+        years = dates.year.to_numpy()
+        self.dates = dates.to_numpy()
+        self.payloads = {}
+        for fred_code, column in FRED_SERIES.items():
+            values = base[column].reindex(years).to_numpy()
+            header, *lines = (
+                pd.DataFrame(
+                    {"observation_date": dates.strftime("%Y-%m-%d"), fred_code: values}
+                )
+                .to_csv(index=False, float_format="%.3f")
+                .encode("utf-8")
+                .splitlines(keepends=True)
+            )
+            # Byte offset of every line, so a date range is a single slice
+            offsets = np.concatenate([[0], np.cumsum([len(line) for line in lines])])
+            self.payloads[fred_code] = (header, b"".join(lines), offsets)
+        self.requests = 0
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                series = stand_in.payloads.get(query.get("id", [""])[0])
+                if series is None:
+                    self.send_error(404)
+                    return
+                header, body, offsets = series
+                start, end = stand_in.row_range(query)
+                payload = header + body[offsets[start] : offsets[end]]
+                stand_in.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def row_range(self, query):
+        """Rows within the cosd/coed observation dates of a request."""
+        start = np.datetime64(query.get("cosd", ["1000-01-01"])[0])
+        end = np.datetime64(query.get("coed", ["9999-12-31"])[0])
+        return (
+            int(np.searchsorted(self.dates, start)),
+            int(np.searchsorted(self.dates, end, side="right")),
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+#
+# Each benchmark is (setup, run, max_rows). setup(n_rows, workdir, stack)
+# returns the arguments for run and is not timed (resources it opens are
+# registered on the ExitStack stack); benchmarks are skipped above max_rows
+# unless --no-caps is given, since some (300 dpi charts, ADF with automatic
+# lag selection, workbooks, Word tables) take minutes per run beyond that.
+
+
+def _setup_download(n_rows, workdir, stack):
+    return (stack.enter_context(FredStandIn(n_rows)),)
+
+
+def _run_download(server):
+    requests_before = server.requests
+    df = download_fred_data(
+        start_date="1960-01-01", end_date="2024-12-31", base_url=server.base_url
+    )
+    if server.requests - requests_before != len(FRED_SERIES):
+        raise RuntimeError("download_fred_data did not use the stand-in server")
+    return df
+
+
+def _setup_raw(n_rows, workdir, stack):
+    return (synthetic_panel(n_rows),)
+
+
+def _run_calculate(raw):
+    return calculate_variables(raw.copy())
+
+
+def _setup_frame(n_rows, workdir, stack):
+    return (analysis_frame(n_rows), workdir)
+
+
+def _run_chart(df, workdir):
+    plt.close(
+        create_dual_axis_chart(
+            df, save_path=os.path.join(workdir, "chart.png"), show=False
+        )
+    )
+
+
+def _run_regression(df, workdir):
+    run_regression_analysis(
+        df, plot_path=os.path.join(workdir, "regression.png"), show=False
+    )
+    plt.close("all")
+
+
+def _run_stationarity(df, workdir):
+    test_stationarity(df)
+
+
+def _run_openpyxl(df, workdir):
+    create_excel_charts.export_workbook(
+        df, os.path.join(workdir, "openpyxl.xlsx"), verbose=False
+    )
+
+
+def _run_xlsxwriter(df, workdir):
+    create_excel_charts_v2.export_workbook(
+        df, os.path.join(workdir, "xlsxwriter.xlsx"), verbose=False
+    )
+
+
+def _setup_markdown(n_rows, workdir, stack):
+    md_file = os.path.join(workdir, f"report_{n_rows}.md")
+    with open(md_file, "w", encoding="utf-8") as f:
+        f.write(synthetic_markdown(n_rows))
+    return md_file, os.path.join(workdir, f"report_{n_rows}.docx")
+
+
+BENCHMARKS = {
+    "download_fred_data": (_setup_download, _run_download, None),
+    "calculate_variables": (_setup_raw, _run_calculate, None),
+    "create_dual_axis_chart": (_setup_frame, _run_chart, 100_000),
+    "run_regression_analysis": (_setup_frame, _run_regression, None),
+    "test_stationarity": (_setup_frame, _run_stationarity, 10_000),
+    "excel_openpyxl": (_setup_frame, _run_openpyxl, 100_000),
+    "excel_xlsxwriter": (_setup_frame, _run_xlsxwriter, 100_000),
+    "markdown_to_docx": (_setup_markdown, markdown_to_docx, 100_000),
+}
+
+
+def _repeats_for(n_rows, repeats):
+    """Fewer repeats at the largest scales, where one run takes seconds."""
+    return repeats if n_rows <= 100_000 else 1
+
+
+def run_benchmarks(scales=None, only=None, repeats=3, caps=True):
+    """Run the selected benchmarks at every scale; returns the result records."""
+    scales = scales or DEFAULT_SCALES
+    results = []
+    workdir = tempfile.mkdtemp(prefix="ho_bench_")
+    try:
+        for name, (setup, run, max_rows) in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            for n_rows in scales:
+                if caps and max_rows is not None and n_rows > max_rows:
+                    print(f"  - {name:<26}{n_rows:>10,} rows  skipped")
+                    continue
+                times = []
+                with contextlib.ExitStack() as stack:
+                    args = setup(n_rows, workdir, stack)
+                    for _ in range(_repeats_for(n_rows, repeats)):
+                        start = time.perf_counter()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            run(*args)
+                        times.append(time.perf_counter() - start)
+                record = {
+                    "benchmark": name,
+                    "rows": n_rows,
+                    "repeats": len(times),
+                    "min_s": min(times),
+                    "median_s": statistics.median(times),
+                }
+                results.append(record)
+                print(
+                    f"  ✓ {name:<26}{n_rows:>10,} rows  "
+                    f"{record['median_s']:>9.3f}s (min {record['min_s']:.3f}s)"
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# =============================================================================
+# Result Storage and Comparison
+# =============================================================================
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results, results_dir=RESULTS_DIR):
+    """Write a run with its environment metadata; returns the file path."""
+    import docx
+    import matplotlib
+    import openpyxl
+    import statsmodels
+    import xlsxwriter
+
+    os.makedirs(results_dir, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    run = {
+        "created": created.isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {
+            module.__name__: getattr(module, "__version__", None)
+            for module in [pd, np, matplotlib, statsmodels, openpyxl, xlsxwriter, docx]
+        },
+        "results": results,
+    }
+    path = os.path.join(results_dir, created.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"\n✓ Results saved to: {path}")
+    return path
+
+
+def previous_results(results_dir=RESULTS_DIR, exclude=None):
+    """Path of the most recent stored run other than exclude, or None."""
+    paths = sorted(glob.glob(os.path.join(results_dir, "*.json")))
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+
+def compare_results(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Print the change in median time per benchmark and scale.
+
+    Returns the (benchmark, rows, ratio) entries slower than threshold.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {
+        (record["benchmark"], record["rows"]): record["median_s"]
+        for record in baseline["results"]
+    }
+
+    print("\n" + "=" * 70)
+    print(f"COMPARISON WITH {baseline_path} ({baseline.get('git_revision')})")
+    print("=" * 70)
+    regressions = []
+    for record in results:
+        key = (record["benchmark"], record["rows"])
+        if key not in previous:
+            continue
+        ratio = record["median_s"] / previous[key] if previous[key] else float("inf")
+        flag = "✗" if ratio > threshold else "✓"
+        print(
+            f"  {flag} {key[0]:<26}{key[1]:>10,} rows  "
+            f"{previous[key]:>9.3f}s -> {record['median_s']:>9.3f}s  ({ratio:.2f}x)"
+        )
+        if ratio > threshold:
+            regressions.append((key[0], key[1], ratio))
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions above {threshold:.2f}x")
+    else:
+        print("\n✓ No regressions")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--no-caps",
+        action="store_true",
+        help="run every benchmark at every scale, including the slow ones",
+    )
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="baseline run to compare with (default: the previous run)",
+    )
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("HECKSCHER-OHLIN BENCHMARKS")
+    print("=" * 70)
+    results = run_benchmarks(args.scales, args.only, args.repeats, not args.no_caps)
+    path = save_results(results, args.results_dir)
+
+    baseline = args.compare or previous_results(args.results_dir, exclude=path)
+    if baseline is None:
+        print("  (no earlier run to compare with)")
+    elif compare_results(results, baseline, args.threshold):
+        sys.exit(1)
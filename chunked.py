@@ -0,0 +1,281 @@
+"""
+Out-of-Core Processing for Panels Larger than Memory
+Streams a CSV panel from disk in chunks of rows, computes the derived
+variables chunk by chunk with calculate_variables and folds every chunk into
+sufficient-statistic accumulators, so the full panel is never loaded:
+
+    RunningStats (summary_statistics.py)   count/missing/mean/std/min/max
+    RunningOLS                              Real Exports on the K/L ratio
+
+Both accumulators keep centred moments and merge exactly (Chan et al.), so
+the results match a single in-memory pass over the full panel up to
+floating-point rounding. Several input files (e.g. one per entity or per
+decade) are processed in parallel worker processes and merged.
+
+Usage:
+    python chunked.py panel.csv --chunksize 500000
+    python chunked.py panel_*.csv --workers 4 --derived-dir derived/
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from heckscher_ohlin_analysis import calculate_variables
+from summary_statistics import SUMMARY_VARIABLES, RunningStats
+
+DEFAULT_CHUNKSIZE = 250_000
+
+REGRESSORS = ["Capital_Labor_Ratio"]
+RESPONSE = "Real_Exports"
+
+
+class RunningOLS:
+    """
+    OLS with an intercept from streamed chunks.
+
+    Keeps the count, the means and the centred cross-product matrix of
+    [regressors, response]; chunks and partial results from other workers
+    combine exactly. The fitted attributes mirror a statsmodels OLS result
+    (params, bse, tvalues, pvalues, rsquared, rsquared_adj, fvalue, nobs), so
+    excel_layout.regression_tables accepts either.
+    """
+
+    def __init__(self, regressors=REGRESSORS, response=RESPONSE):
+        self.regressors = list(regressors)
+        self.response = response
+        k = len(self.regressors) + 1
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    @property
+    def columns(self):
+        return self.regressors + [self.response]
+
+    def update(self, df):
+        """Add the complete rows of a chunk (rows with any NaN are dropped)."""
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            mean = values.mean(axis=0)
+            centred = values - mean
+            self._combine(len(values), mean, centred.T @ centred)
+        return self
+
+    def merge(self, other):
+        """Fold another RunningOLS over the same variables into this one."""
+        if other.n:
+            self._combine(other.n, other.mean, other.comoment)
+        return self
+
+    def _combine(self, n, mean, comoment):
+        total = self.n + n
+        delta = mean - self.mean
+        self.comoment = (
+            self.comoment + comoment + np.outer(delta, delta) * (self.n * n / total)
+        )
+        self.mean = self.mean + delta * (n / total)
+        self.n = total
+
+    # -------------------------------------------------------------------------
+    # Fitted model
+    # -------------------------------------------------------------------------
+
+    @property
+    def nobs(self):
+        return float(self.n)
+
+    def _fit(self):
+        k = len(self.regressors)
+        sxx = self.comoment[:k, :k]
+        sxy = self.comoment[:k, k]
+        syy = self.comoment[k, k]
+        slopes = np.linalg.solve(sxx, sxy)
+        ssr = max(syy - sxy @ slopes, 0.0)
+        return sxx, slopes, ssr, syy
+
+    @property
+    def params(self):
+        _, slopes, _, _ = self._fit()
+        intercept = self.mean[-1] - self.mean[:-1] @ slopes
+        return pd.Series(
+            np.concatenate([[intercept], slopes]), index=["const"] + self.regressors
+        )
+
+    @property
+    def df_resid(self):
+        return self.n - len(self.regressors) - 1
+
+    @property
+    def bse(self):
+        sxx, _, ssr, _ = self._fit()
+        sigma2 = ssr / self.df_resid
+        sxx_inv = np.linalg.inv(sxx)
+        x_mean = self.mean[:-1]
+        variances = np.concatenate(
+            [[1.0 / self.n + x_mean @ sxx_inv @ x_mean], np.diag(sxx_inv)]
+        )
+        return pd.Series(np.sqrt(sigma2 * variances), index=self.params.index)
+
+    @property
+    def tvalues(self):
+        return self.params / self.bse
+
+    @property
+    def pvalues(self):
+        tvalues = self.tvalues
+        return pd.Series(
+            2 * stats.t.sf(np.abs(tvalues), self.df_resid), index=tvalues.index
+        )
+
+    @property
+    def rsquared(self):
+        _, _, ssr, syy = self._fit()
+        return 1.0 - ssr / syy
+
+    @property
+    def rsquared_adj(self):
+        return 1.0 - (1.0 - self.rsquared) * (self.n - 1) / self.df_resid
+
+    @property
+    def fvalue(self):
+        k = len(self.regressors)
+        r2 = self.rsquared
+        return (r2 / k) / ((1.0 - r2) / self.df_resid)
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield chunks of a raw FRED-series CSV with the derived variables added."""
+    for chunk in pd.read_csv(path, chunksize=chunksize, index_col="Year"):
+        yield calculate_variables(chunk, verbose=False)
+
+
+def process_file(path, chunksize=DEFAULT_CHUNKSIZE, variables=None, derived=None):
+    """
+    Stream one CSV through the derived-variable computation and accumulators.
+
+    Returns (RunningStats, RunningOLS, rows). When derived is a path, the
+    chunks with the derived variables are appended to that CSV as they are
+    computed.
+    """
+    columns = [column for _, column in variables or SUMMARY_VARIABLES]
+    summary = RunningStats(len(columns))
+    ols = RunningOLS()
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(path, chunksize)):
+        summary.update(chunk[columns].to_numpy(dtype=np.float64))
+        ols.update(chunk)
+        rows += len(chunk)
+        if derived is not None:
+            chunk.to_csv(derived, mode="w" if i == 0 else "a", header=i == 0)
+    return summary, ols, rows
+
+
+def derived_paths(paths, derived_dir):
+    """
+    Derived CSV path for every input under derived_dir.
+
+    Inputs keep their path below their common directory, so us/data.csv
+    and uk/data.csv become derived_dir/us/data.csv and derived_dir/uk/data.csv.
+    Raises ValueError if two inputs would still write the same file.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    derived, seen = [], {}
+    for path in paths:
+        relative = os.path.relpath(os.path.abspath(path), root)
+        out = os.path.normpath(os.path.join(derived_dir, relative))
+        key = os.path.normcase(os.path.abspath(out))
+        if key in seen:
+            raise ValueError(f"{seen[key]} and {path} would both be written to {out}")
+        seen[key] = path
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        derived.append(out)
+    return derived
+
+
+def process_files(
+    paths, chunksize=DEFAULT_CHUNKSIZE, variables=None, derived_dir=None, max_workers=1
+):
+    """
+    Full-sample summary statistics and OLS over one or more CSV files.
+
+    Files are processed in parallel when max_workers > 1 and the partial
+    accumulators merged in input order. With derived_dir, every input is
+    also written there with the derived variables (see derived_paths).
+    Returns (summary table in the summarize() layout without quantiles,
+    RunningOLS, total rows).
+    """
+    variables = variables or SUMMARY_VARIABLES
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    derived = [None] * len(paths)
+    if derived_dir is not None:
+        derived = derived_paths(paths, derived_dir)
+
+    if max_workers and max_workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+            parts = list(
+                pool.map(
+                    process_file,
+                    paths,
+                    [chunksize] * len(paths),
+                    [variables] * len(paths),
+                    derived,
+                )
+            )
+    else:
+        parts = [
+            process_file(path, chunksize, variables, out)
+            for path, out in zip(paths, derived)
+        ]
+
+    summary, ols, rows = parts[0]
+    for part_summary, part_ols, part_rows in parts[1:]:
+        summary.merge(part_summary)
+        ols.merge(part_ols)
+        rows += part_rows
+    return summary.to_frame([label for label, _ in variables]), ols, rows
+
+
+if __name__ == "__main__":
+    from excel_layout import regression_tables
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("paths", nargs="+", help="raw FRED-series CSV file(s)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--derived-dir",
+        metavar="DIR",
+        help="also write each input with the derived variables to DIR",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary, ols, rows = process_files(
+        args.paths,
+        args.chunksize,
+        derived_dir=args.derived_dir,
+        max_workers=args.workers,
+    )
+    seconds = time.perf_counter() - start
+
+    print("=" * 70)
+    print(f"CHUNKED ANALYSIS: {rows:,} rows from {len(args.paths)} file(s)")
+    print("=" * 70)
+    print(
+        summary.drop(columns=["25%", "Median", "75%"]).round(2).to_string(index=False)
+    )
+    coefficients, fit = regression_tables(ols)
+    print("\nRegression: Real Exports on Capital-Labor Ratio")
+    print(coefficients.round(6).to_string(index=False))
+    print(fit.round(4).to_string(index=False))
+    print(f"\n✓ Processed in {seconds:.2f}s")
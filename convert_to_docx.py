@@ -6,195 +6,494 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from lxml import etree
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import glob
+import hashlib
+import json
+import os
 import re
+import time
 
+# Part of every section cache key; bump it whenever rendering changes so
+# stale cached sections are not reused
+RENDER_VERSION = "1"
 
-def markdown_to_docx(md_file, docx_file):
-    """Convert markdown file to Word document with formatting."""
+DEFAULT_CACHE_DIR = ".docx_cache"
 
-    # Read markdown content
-    with open(md_file, "r", encoding="utf-8") as f:
-        content = f.read()
+# Cached sections not used for this many days are pruned after a batch
+CACHE_MAX_AGE_DAYS = 30
 
-    # Create Word document
-    doc = Document()
+# Block-level patterns, tried in order against each line. Only the first
+# alternative that matches is used, mirroring the precedence of the blocks.
+BLOCK_PATTERN = re.compile(
+    r"(?P<fence>\s*```)"
+    r"|(?P<table>\s*\|.*)"
+    r"|(?P<level>#{1,4}) (?P<heading>.*)"
+    r"|(?P<rule>\s*---\s*$)"
+    r"|\s*[-*] (?P<bullet>.*?)\s*$"
+    r"|\s*\d+\.\s+(?P<numbered>.+?)\s*$"
+    r"|(?P<blank>\s*$)"
+)
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|[\s\-:|]+\|$")
+HEADING_PATTERN = re.compile(r"#{1,4} ")
 
-    # Set up styles
-    styles = doc.styles
+# Inline spans; text outside any span is matched by the last alternative
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>[^*]+)\*\*"
+    r"|\*(?P<italic>[^*]+)\*"
+    r"|`(?P<code>[^`]+)`"
+    r"|\$(?P<math>[^$]+)\$"
+    r"|\$\$(?P<display_math>[^$]+)\$\$"
+    r"|(?P<text>[^*`$]+)"
+)
+BOLD_PATTERN = re.compile(r"\*\*([^*]+)\*\*")
+ITALIC_PATTERN = re.compile(r"\*([^*]+)\*")
 
-    # Process content line by line
-    lines = content.split("\n")
-    i = 0
-    in_code_block = False
-    code_content = []
-    in_table = False
+
+def iter_blocks(lines):
+    """
+    Tokenize markdown lines into blocks in a single pass.
+
+    lines can be any iterable (e.g. an open file), so the document is
+    streamed rather than split into a list. Yields tuples:
+    ("code", lines), ("table", rows), ("heading", level, text), ("rule",),
+    ("bullet", text), ("numbered", text) and ("paragraph", text).
+    """
+    code_lines = None
     table_rows = []
 
-    while i < len(lines):
-        line = lines[i]
+    for line in lines:
+        line = line.rstrip("\r\n")
 
-        # Handle code blocks
-        if line.strip().startswith("```"):
-            if in_code_block:
-                # End code block
-                if code_content:
-                    p = doc.add_paragraph()
-                    p.style = "No Spacing"
-                    for code_line in code_content:
-                        run = p.add_run(code_line + "\n")
-                        run.font.name = "Courier New"
-                        run.font.size = Pt(9)
-                code_content = []
-                in_code_block = False
+        if code_lines is not None:
+            if line.strip().startswith("```"):
+                if code_lines:
+                    yield ("code", code_lines)
+                code_lines = None
             else:
-                # Start code block
-                in_code_block = True
-            i += 1
+                code_lines.append(line)
             continue
 
-        if in_code_block:
-            code_content.append(line)
-            i += 1
-            continue
-
-        # Handle tables
-        if "|" in line and line.strip().startswith("|"):
-            if not in_table:
-                in_table = True
-                table_rows = []
+        match = BLOCK_PATTERN.match(line)
+        kind = match.lastgroup if match else None
 
+        if kind == "table":
             # Skip separator rows
-            if re.match(r"^\|[\s\-:|]+\|$", line.strip()):
-                i += 1
-                continue
-
-            # Parse table row
-            cells = [cell.strip() for cell in line.split("|")[1:-1]]
-            table_rows.append(cells)
-            i += 1
+            if not TABLE_SEPARATOR_PATTERN.match(line.strip()):
+                table_rows.append([cell.strip() for cell in line.split("|")[1:-1]])
             continue
-        elif in_table:
-            # End of table, create it
-            if table_rows:
-                num_cols = max(len(row) for row in table_rows)
-                table = doc.add_table(rows=len(table_rows), cols=num_cols)
-                table.style = "Table Grid"
-
-                for row_idx, row_data in enumerate(table_rows):
-                    for col_idx, cell_data in enumerate(row_data):
-                        if col_idx < num_cols:
-                            cell = table.rows[row_idx].cells[col_idx]
-                            # Clean markdown formatting
-                            clean_text = re.sub(r"\*\*([^*]+)\*\*", r"\1", cell_data)
-                            clean_text = re.sub(r"\*([^*]+)\*", r"\1", clean_text)
-                            cell.text = clean_text
-
-                doc.add_paragraph()  # Space after table
+        if table_rows:
+            yield ("table", table_rows)
             table_rows = []
-            in_table = False
 
-        # Handle headers
-        if line.startswith("# "):
-            p = doc.add_heading(line[2:].strip(), level=1)
-            i += 1
-            continue
-        elif line.startswith("## "):
-            p = doc.add_heading(line[3:].strip(), level=2)
-            i += 1
-            continue
-        elif line.startswith("### "):
-            p = doc.add_heading(line[4:].strip(), level=3)
-            i += 1
-            continue
-        elif line.startswith("#### "):
-            p = doc.add_heading(line[5:].strip(), level=4)
-            i += 1
-            continue
+        if kind == "fence":
+            code_lines = []
+        elif kind == "heading":
+            yield ("heading", len(match.group("level")), match.group("heading").strip())
+        elif kind == "rule":
+            yield ("rule",)
+        elif kind in ("bullet", "numbered"):
+            yield (kind, match.group(kind))
+        elif kind != "blank":
+            yield ("paragraph", line)
+
+    if table_rows:
+        yield ("table", table_rows)
+
+
+def clean_cell_text(text):
+    """Strip **bold** and *italic* markers from a table cell."""
+    return ITALIC_PATTERN.sub(r"\1", BOLD_PATTERN.sub(r"\1", text))
+
+
+def _cell_xml(text, width):
+    """WordprocessingML for one table cell holding plain text."""
+    if not text:
+        paragraph = "<w:p/>"
+    else:
+        space = ' xml:space="preserve"' if text != text.strip() else ""
+        paragraph = f"<w:p><w:r><w:t{space}>{escape(text)}</w:t></w:r></w:p>"
+    return (
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>{paragraph}</w:tc>'
+    )
+
 
-        # Handle horizontal rules
-        if line.strip() == "---":
+def add_table_rows(doc, rows, style="Table Grid"):
+    """
+    Add a table of plain-text rows to the document in one pass.
+
+    Filling cells through table.rows[i].cells[j] rebuilds the row's cell list
+    on every access, which makes large tables roughly quadratic. Here every
+    row is serialized to WordprocessingML up front and the whole block is
+    parsed and attached to the table at once. Short rows are padded with
+    empty cells.
+    """
+    num_cols = max(len(row) for row in rows)
+    table = doc.add_table(rows=0, cols=num_cols)
+    table.style = style
+
+    widths = [grid_col.w.twips for grid_col in table._tbl.tblGrid.gridCol_lst]
+    rows_xml = "".join(
+        "<w:tr>"
+        + "".join(
+            _cell_xml(row[col] if col < len(row) else "", widths[col])
+            for col in range(num_cols)
+        )
+        + "</w:tr>"
+        for row in rows
+    )
+    fragment = parse_xml(f'<w:tbl {nsdecls("w")}>{rows_xml}</w:tbl>')
+    table._tbl.extend(list(fragment))
+    return table
+
+
+def add_table(doc, table_rows):
+    """Add a grid table for the parsed markdown rows."""
+    table = add_table_rows(
+        doc, [[clean_cell_text(cell) for cell in row] for row in table_rows]
+    )
+    doc.add_paragraph()  # Space after table
+    return table
+
+
+def render_blocks(doc, blocks):
+    """Append the blocks produced by iter_blocks() to a Word document."""
+    for block in blocks:
+        kind = block[0]
+
+        if kind == "code":
+            p = doc.add_paragraph()
+            p.style = "No Spacing"
+            for code_line in block[1]:
+                run = p.add_run(code_line + "\n")
+                run.font.name = "Courier New"
+                run.font.size = Pt(9)
+        elif kind == "table":
+            add_table(doc, block[1])
+        elif kind == "heading":
+            doc.add_heading(block[2], level=block[1])
+        elif kind == "rule":
             doc.add_paragraph("─" * 50)
-            i += 1
-            continue
+        elif kind == "bullet":
+            add_formatted_text(doc.add_paragraph(style="List Bullet"), block[1])
+        elif kind == "numbered":
+            add_formatted_text(doc.add_paragraph(style="List Number"), block[1])
+        else:
+            add_formatted_text(doc.add_paragraph(), block[1])
 
-        # Handle bullet points
-        if line.strip().startswith("- ") or line.strip().startswith("* "):
-            text = line.strip()[2:]
-            p = doc.add_paragraph(style="List Bullet")
-            add_formatted_text(p, text)
-            i += 1
-            continue
 
-        # Handle numbered lists
-        match = re.match(r"^(\d+)\.\s+(.+)$", line.strip())
-        if match:
-            text = match.group(2)
-            p = doc.add_paragraph(style="List Number")
-            add_formatted_text(p, text)
-            i += 1
-            continue
+def iter_sections(lines):
+    """
+    Split markdown lines into heading-delimited sections.
+
+    A new section starts at every heading line outside a code block. Block
+    state never carries across a heading, so rendering the sections one by
+    one gives the same document as rendering the whole file.
+    """
+    section = []
+    in_code_block = False
+
+    for line in lines:
+        if line.strip().startswith("```"):
+            in_code_block = not in_code_block
+        elif not in_code_block and HEADING_PATTERN.match(line) and section:
+            yield "".join(section)
+            section = []
+        section.append(line if line.endswith("\n") else line + "\n")
+
+    if section:
+        yield "".join(section)
+
+
+def _render_sections_cached(doc, sections, cache_dir):
+    """
+    Render sections into doc, reusing cached body XML for unchanged ones.
 
-        # Handle empty lines
-        if line.strip() == "":
-            i += 1
+    Each section's rendered elements are stored in cache_dir under the SHA-256
+    of RENDER_VERSION plus the section text; a hit refreshes the file's
+    modification time. Returns (rendered, total).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    body = doc.element.body
+    sect_pr = body.sectPr
+    rendered = total = 0
+
+    for section in sections:
+        total += 1
+        key = hashlib.sha256(f"{RENDER_VERSION}\n{section}".encode("utf-8"))
+        cache_path = os.path.join(cache_dir, key.hexdigest() + ".xml")
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                fragment = parse_xml(f.read())
+            # The modification time records the last use, for prune_cache
+            os.utime(cache_path)
+            for element in list(fragment):
+                sect_pr.addprevious(element)
             continue
 
-        # Handle regular paragraphs
-        p = doc.add_paragraph()
-        add_formatted_text(p, line)
-        i += 1
-
-    # Handle any remaining table
-    if in_table and table_rows:
-        num_cols = max(len(row) for row in table_rows)
-        table = doc.add_table(rows=len(table_rows), cols=num_cols)
-        table.style = "Table Grid"
-
-        for row_idx, row_data in enumerate(table_rows):
-            for col_idx, cell_data in enumerate(row_data):
-                if col_idx < num_cols:
-                    cell = table.rows[row_idx].cells[col_idx]
-                    clean_text = re.sub(r"\*\*([^*]+)\*\*", r"\1", cell_data)
-                    clean_text = re.sub(r"\*([^*]+)\*", r"\1", clean_text)
-                    cell.text = clean_text
+        # python-docx inserts new blocks just before the section properties
+        start = body.index(sect_pr)
+        render_blocks(doc, iter_blocks(section.splitlines()))
+        elements = body[start : body.index(sect_pr)]
+        # Write to a temporary name first: batch workers share the cache
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(f'<w:body {nsdecls("w")}>'.encode("utf-8"))
+            for element in elements:
+                f.write(etree.tostring(element, encoding="utf-8"))
+            f.write(b"</w:body>")
+        os.replace(tmp_path, cache_path)
+        rendered += 1
+
+    return rendered, total
+
+
+def markdown_to_docx(md_file, docx_file, cache_dir=None):
+    """
+    Convert markdown file to Word document with formatting.
+
+    With cache_dir set, the file is split into heading-delimited sections
+    and only sections whose content changed since the last conversion are
+    re-rendered; the rest are assembled from the cache.
+    """
+
+    # Create Word document
+    doc = Document()
+
+    # Stream the markdown through the tokenizer
+    with open(md_file, "r", encoding="utf-8") as f:
+        if cache_dir is None:
+            render_blocks(doc, iter_blocks(f))
+        else:
+            rendered, total = _render_sections_cached(doc, iter_sections(f), cache_dir)
 
     # Save document
     doc.save(docx_file)
     print(f"✓ Successfully converted to: {docx_file}")
+    if cache_dir is not None:
+        print(f"  {rendered} of {total} sections re-rendered")
 
 
 def add_formatted_text(paragraph, text):
-    """Add text with bold and italic formatting."""
-    # Pattern to find **bold** and *italic* text
-    pattern = r"(\*\*[^*]+\*\*|\*[^*]+\*|`[^`]+`|\$[^$]+\$|\$\$[^$]+\$\$|[^*`$]+)"
-    parts = re.findall(pattern, text)
-
-    for part in parts:
-        if part.startswith("**") and part.endswith("**"):
-            run = paragraph.add_run(part[2:-2])
+    """Add text with bold, italic, code and math formatting."""
+    for match in INLINE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        run = paragraph.add_run(match.group(kind))
+        if kind == "bold":
             run.bold = True
-        elif part.startswith("*") and part.endswith("*"):
-            run = paragraph.add_run(part[1:-1])
+        elif kind in ("italic", "math", "display_math"):
             run.italic = True
-        elif part.startswith("`") and part.endswith("`"):
-            run = paragraph.add_run(part[1:-1])
+        elif kind == "code":
             run.font.name = "Courier New"
             run.font.size = Pt(10)
-        elif part.startswith("$$") and part.endswith("$$"):
-            run = paragraph.add_run(part[2:-2])
-            run.italic = True
-        elif part.startswith("$") and part.endswith("$"):
-            run = paragraph.add_run(part[1:-1])
-            run.italic = True
+
+
+def collect_markdown_files(inputs):
+    """Expand files, directories (their *.md files) and glob patterns."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(glob.glob(os.path.join(item, "*.md"))))
+        elif glob.has_magic(item):
+            files.extend(sorted(glob.glob(item, recursive=True)))
         else:
-            paragraph.add_run(part)
+            files.append(item)
+    # Keep the first occurrence of each file
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
 
 
-if __name__ == "__main__":
-    import os
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 
-    base_path = r"C:\Users\nduta\OneDrive\Desktop\Projects\Resource-Allocation-Constrained-Optimization"
-    md_file = os.path.join(base_path, "assignment_answers.md")
-    docx_file = os.path.join(base_path, "assignment_answers.docx")
+def _convert_one(md_file, docx_file, cache_dir):
+    """Worker: convert one file and return the elapsed seconds."""
+    start = time.perf_counter()
+    markdown_to_docx(md_file, docx_file, cache_dir=cache_dir)
+    return time.perf_counter() - start
+
+
+def prune_cache(cache_dir, max_age_days=CACHE_MAX_AGE_DAYS):
+    """
+    Delete cached sections not used for max_age_days; returns the count.
+
+    Pruning by age rather than by the sections of one run keeps entries
+    that other documents (or concurrent workers) still use.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith((".xml", ".tmp")) and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def output_paths(md_files, output_dir=None):
+    """
+    DOCX path for every markdown file.
+
+    Without output_dir each output goes next to its source. With output_dir
+    the sources' directories below their common parent are kept, so
+    US/report.md and DE/report.md become output_dir/US/report.docx and
+    output_dir/DE/report.docx. Raises ValueError if two sources would still
+    write the same file.
+    """
+    if output_dir is not None and md_files:
+        root = os.path.commonpath(
+            [os.path.dirname(os.path.abspath(path)) for path in md_files]
+        )
+    targets = []
+    for md_file in md_files:
+        stem = os.path.splitext(os.path.basename(md_file))[0]
+        directory = os.path.dirname(md_file)
+        if output_dir is not None:
+            relative = os.path.relpath(os.path.dirname(os.path.abspath(md_file)), root)
+            directory = os.path.normpath(os.path.join(output_dir, relative))
+        targets.append(os.path.join(directory, stem + ".docx"))
+
+    seen = {}
+    for md_file, target in zip(md_files, targets):
+        key = os.path.normcase(os.path.abspath(target))
+        if key in seen:
+            raise ValueError(
+                f"{seen[key]} and {md_file} would both be written to {target}"
+            )
+        seen[key] = md_file
+    for directory in {os.path.dirname(target) for target in targets}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    return targets
+
+
+def convert_batch(
+    md_files,
+    output_dir=None,
+    max_workers=None,
+    cache_dir=None,
+    force=False,
+    manifest_path=".docx_manifest.json",
+    cache_max_age_days=CACHE_MAX_AGE_DAYS,
+):
+    """
+    Convert many markdown files to DOCX in a process pool.
+
+    Outputs go next to their sources unless output_dir is given (see
+    output_paths; clashing outputs raise ValueError before any job). A file is
+    skipped when its output is newer than the source, or when the source's
+    SHA-256 matches the one recorded in the manifest for that output (e.g.
+    after a checkout touched the file without changing it). force=True
+    converts everything. Once every job has finished, cached sections not
+    used for cache_max_age_days are pruned (None keeps them all). Returns
+    one record per file with its status and timing.
+    """
+    manifest = {}
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    results = []
+    jobs = {}
+    targets = output_paths(md_files, output_dir)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for md_file, docx_file in zip(md_files, targets):
+            source_hash = _file_hash(md_file)
+            record = {"source": md_file, "output": docx_file, "seconds": 0.0}
+
+            if not force and os.path.exists(docx_file):
+                up_to_date = os.path.getmtime(docx_file) >= os.path.getmtime(md_file)
+                if up_to_date or manifest.get(docx_file) == source_hash:
+                    record["status"] = "skipped"
+                    manifest[docx_file] = source_hash
+                    results.append(record)
+                    continue
+
+            future = pool.submit(_convert_one, md_file, docx_file, cache_dir)
+            jobs[future] = (record, source_hash)
+
+        for future in as_completed(jobs):
+            record, source_hash = jobs[future]
+            try:
+                record["seconds"] = future.result()
+                record["status"] = "converted"
+                manifest[record["output"]] = source_hash
+            except Exception as e:
+                record["status"] = f"failed: {e}"
+            results.append(record)
+
+    if manifest_path:
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print("\nBatch conversion summary:")
+    for record in sorted(results, key=lambda r: r["source"]):
+        print(
+            f"  {record['status']:<10} {record['seconds']:7.2f}s  "
+            f"{os.path.relpath(record['source'])}"
+        )
+    converted = sum(r["status"] == "converted" for r in results)
+    skipped = sum(r["status"] == "skipped" for r in results)
+    failed = len(results) - converted - skipped
+    print(f"\n✓ {converted} converted, {skipped} skipped, {failed} failed")
+    if cache_dir is not None and cache_max_age_days is not None:
+        removed = prune_cache(cache_dir, cache_max_age_days)
+        if removed:
+            print(f"  {removed} unused cached sections pruned from {cache_dir}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert markdown reports to DOCX")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="markdown files, directories or glob patterns "
+        "(default: assignment_answers.md next to this script)",
+    )
+    parser.add_argument(
+        "--output-dir", help="write DOCX files here, keeping source subdirectories"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="section cache for incremental rebuilds ('' to disable)",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=CACHE_MAX_AGE_DAYS,
+        metavar="DAYS",
+        help="prune cached sections unused for DAYS",
+    )
+    parser.add_argument("--manifest", default=".docx_manifest.json")
+    parser.add_argument(
+        "--force", action="store_true", help="convert even if up to date"
+    )
+    args = parser.parse_args()
 
-    markdown_to_docx(md_file, docx_file)
+    inputs = args.inputs or [
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "assignment_answers.md"
+        )
+    ]
+    convert_batch(
+        collect_markdown_files(inputs),
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+        cache_dir=args.cache_dir or None,
+        force=args.force,
+        manifest_path=args.manifest,
+        cache_max_age_days=args.cache_max_age,
+    )
@@ -5,21 +5,108 @@ This script generates an Excel file with the same charts as the Python analysis:
 2. Scatter plot: Real Exports vs Capital-Labor Ratio (with trendline)
 """
 
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.chart import LineChart, ScatterChart, Reference, Series
 from openpyxl.chart.axis import DateAxis
+from openpyxl.chart.series import SeriesLabel
 from openpyxl.chart.trendline import Trendline
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 import os
 
-
-def create_excel_with_charts():
-    """Create Excel file with data and charts"""
+from excel_layout import (
+    DATA_HEADERS,
+    DATA_SHEET,
+    PERCENT_COLUMNS,
+    REGRESSION_SHEET,
+    column_letter,
+    data_column,
+    data_columns,
+    export_frame,
+    regression_tables,
+)
+from summary_statistics import COUNT_COLUMNS, STAT_COLUMNS, summarize
+
+
+def _register_styles(wb):
+    """Register the shared named styles used by every sheet."""
+    thin_border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
+    wb.add_named_style(
+        NamedStyle(
+            name="ho_header",
+            font=Font(color="FFFFFF", bold=True),
+            fill=PatternFill(
+                start_color="4472C4", end_color="4472C4", fill_type="solid"
+            ),
+            alignment=Alignment(horizontal="center"),
+            border=thin_border,
+        )
+    )
+    wb.add_named_style(NamedStyle(name="ho_cell", border=thin_border))
+    wb.add_named_style(
+        NamedStyle(name="ho_number", border=thin_border, number_format="#,##0.00")
+    )
+    wb.add_named_style(
+        NamedStyle(name="ho_count", border=thin_border, number_format="#,##0")
+    )
+    wb.add_named_style(
+        NamedStyle(name="ho_percent", border=thin_border, number_format="0.00%")
+    )
+    wb.add_named_style(NamedStyle(name="ho_title", font=Font(bold=True, size=14)))
+
+
+def _styled_row(ws, values, style):
+    """Wrap a row of values in write-only cells that share one named style."""
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        row.append(cell)
+    return row
+
+
+def _append_columns(ws, columns, styles):
+    """
+    Stream equal-length columns to a write-only sheet, one row at a time.
+
+    styles holds one named style per column; None leaves the column unstyled
+    so its values are appended as plain Python objects.
+    """
+    lists = [np.asarray(values).tolist() for values in columns]
+    for values in zip(*lists):
+        row = []
+        for value, style in zip(values, styles):
+            if style is None:
+                row.append(value)
+            else:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style
+                row.append(cell)
+        ws.append(row)
+
+
+def create_excel_with_charts(
+    csv_path="heckscher_ohlin_data.csv",
+    output_file="heckscher_ohlin_charts.xlsx",
+    summary_variables=None,
+):
+    """
+    Create Excel file with data and charts
+
+    The workbook is opened in write-only mode so rows are streamed to disk as
+    they are appended and memory stays bounded for large panels.
+    summary_variables lists the (label, column) pairs for the Summary sheet
+    (default: SUMMARY_VARIABLES).
+    """
 
     # Load the data
-    csv_path = "heckscher_ohlin_data.csv"
     if not os.path.exists(csv_path):
         print(
             f"Error: {csv_path} not found. Please run heckscher_ohlin_analysis.py first."
@@ -29,97 +116,53 @@ def create_excel_with_charts():
     df = pd.read_csv(csv_path)
     print(f"Loaded data with {len(df)} rows")
 
+    return export_workbook(df, output_file, summary_variables=summary_variables)
+
+
+def export_workbook(df, output_file, summary_variables=None, model=None, verbose=True):
+    """
+    Write the Data, chart and Summary sheets for an in-memory DataFrame.
+
+    df may carry Year as a column or as its index (as returned by
+    heckscher_ohlin_analysis.main()). Pass the fitted OLS model to add a
+    Regression sheet with its coefficients and fit statistics.
+    """
+    df = export_frame(df)
+
     # Create workbook
-    wb = Workbook()
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
 
     # =========================================================================
-    # Sheet 1: Data
+    # Sheet 1: Data - the only copy of the dataset; every chart points here
     # =========================================================================
-    ws_data = wb.active
-    ws_data.title = "Data"
-
-    # Write headers with formatting
-    headers = [
-        "Year",
-        "Real_GDP",
-        "Labor_Force",
-        "Real_Investment",
-        "Real_Exports",
-        "Capital_Deepening_Pct",
-        "Capital_Labor_Ratio",
-    ]
-
-    header_fill = PatternFill(
-        start_color="4472C4", end_color="4472C4", fill_type="solid"
-    )
-    header_font = Font(color="FFFFFF", bold=True)
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
-
-    for col, header in enumerate(headers, 1):
-        cell = ws_data.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = thin_border
-
-    # Write data
-    for row_idx, row in df.iterrows():
-        for col_idx, header in enumerate(headers):
-            cell = ws_data.cell(row=row_idx + 2, column=col_idx + 1, value=row[header])
-            cell.border = thin_border
-            if col_idx >= 5:  # Format percentages and ratios
-                cell.number_format = "#,##0.00"
-            elif col_idx >= 1 and col_idx <= 4:
-                cell.number_format = "#,##0.00"
+    ws_data = wb.create_sheet(DATA_SHEET)
 
-    # Adjust column widths
+    # Adjust column widths (must be set before rows are streamed)
     column_widths = [8, 15, 15, 18, 15, 22, 20]
     for col, width in enumerate(column_widths, 1):
         ws_data.column_dimensions[chr(64 + col)].width = width
 
+    # Write headers with formatting
+    ws_data.append(_styled_row(ws_data, DATA_HEADERS, "ho_header"))
+
+    # Write data - percentage columns are stored as fractions for % display
+    _append_columns(
+        ws_data,
+        data_columns(df),
+        ["ho_cell"]
+        + [
+            "ho_percent" if header in PERCENT_COLUMNS else "ho_number"
+            for header in DATA_HEADERS[1:]
+        ],
+    )
+
     # =========================================================================
     # Sheet 2: Dual-Axis Chart (Capital Deepening & K/L Ratio)
     # As per instructions: Left Axis = Capital Deepening (%), Right Axis = K/L Ratio ($)
     # =========================================================================
     ws_chart1 = wb.create_sheet("Dual-Axis Chart")
 
-    # Headers with formatting
-    ws_chart1["A1"] = "Year"
-    ws_chart1["B1"] = "Capital Deepening (%)"
-    ws_chart1["C1"] = "Capital-Labor Ratio ($)"
-
-    for col in range(1, 4):
-        cell = ws_chart1.cell(row=1, column=col)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = thin_border
-
-    for i, row in enumerate(df.iterrows(), 2):
-        idx, data = row
-        # Store year as STRING so it displays as category label on x-axis
-        ws_chart1.cell(row=i, column=1, value=str(int(data["Year"]))).border = (
-            thin_border
-        )
-        ws_chart1.cell(row=i, column=2, value=data["Capital_Deepening_Pct"]).border = (
-            thin_border
-        )
-        ws_chart1.cell(row=i, column=2).number_format = "#,##0.00"
-        ws_chart1.cell(row=i, column=3, value=data["Capital_Labor_Ratio"]).border = (
-            thin_border
-        )
-        ws_chart1.cell(row=i, column=3).number_format = "#,##0.00"
-
-    # Adjust column widths
-    ws_chart1.column_dimensions["A"].width = 8
-    ws_chart1.column_dimensions["B"].width = 22
-    ws_chart1.column_dimensions["C"].width = 22
-
     num_rows = len(df) + 1
 
     # Create PRIMARY line chart for Capital Deepening (LEFT AXIS)
@@ -129,6 +172,7 @@ def create_excel_with_charts():
     chart1.width = 20
     chart1.height = 12
     chart1.y_axis.title = "Capital Deepening (%)"
+    chart1.y_axis.number_format = "0%"
     chart1.x_axis.title = "Year"
 
     # X-axis category labels settings
@@ -136,14 +180,22 @@ def create_excel_with_charts():
     chart1.x_axis.tickMarkSkip = 5
 
     # Add Capital Deepening data (primary/left axis)
-    data1 = Reference(ws_chart1, min_col=2, min_row=1, max_row=num_rows)
-    # Categories are the years in column A (row 2 to end, as row 1 is header)
-    cats = Reference(ws_chart1, min_col=1, min_row=2, max_row=num_rows)
-    chart1.add_data(data1, titles_from_data=True)
+    data1 = Reference(
+        ws_data,
+        min_col=data_column("Capital_Deepening_Pct") + 1,
+        min_row=2,
+        max_row=num_rows,
+    )
+    # Categories are the years on the Data sheet (row 1 is the header)
+    cats = Reference(
+        ws_data, min_col=data_column("Year") + 1, min_row=2, max_row=num_rows
+    )
+    chart1.add_data(data1)
     chart1.set_categories(cats)
 
     # Style the first series (blue line) - Capital Deepening
     s1 = chart1.series[0]
+    s1.tx = SeriesLabel(v="Capital Deepening (%)")
     s1.graphicalProperties.line.solidFill = "1F77B4"
     s1.graphicalProperties.line.width = 25000
     s1.marker.symbol = "circle"
@@ -157,11 +209,17 @@ def create_excel_with_charts():
     chart2.y_axis.title = "K/L Ratio ($)"
 
     # Add K/L Ratio data (secondary/right axis)
-    data2 = Reference(ws_chart1, min_col=3, min_row=1, max_row=num_rows)
-    chart2.add_data(data2, titles_from_data=True)
+    data2 = Reference(
+        ws_data,
+        min_col=data_column("Capital_Labor_Ratio") + 1,
+        min_row=2,
+        max_row=num_rows,
+    )
+    chart2.add_data(data2)
 
     # Style the second series (red line) - K/L Ratio
     s2 = chart2.series[0]
+    s2.tx = SeriesLabel(v="K/L Ratio ($)")
     s2.graphicalProperties.line.solidFill = "D62728"
     s2.graphicalProperties.line.width = 25000
     s2.marker.symbol = "square"
@@ -174,22 +232,13 @@ def create_excel_with_charts():
     chart2.y_axis.crosses = "max"
     chart1 += chart2
 
-    ws_chart1.add_chart(chart1, "E2")
+    ws_chart1.add_chart(chart1, "B2")
 
     # =========================================================================
     # Sheet 3: Regression Scatter Plot
     # =========================================================================
     ws_chart2 = wb.create_sheet("Regression Plot")
 
-    # Copy Capital_Labor_Ratio and Real_Exports for the scatter plot
-    ws_chart2["A1"] = "Capital-Labor Ratio ($)"
-    ws_chart2["B1"] = "Real Exports (Billions $)"
-
-    for i, row in enumerate(df.iterrows(), 2):
-        idx, data = row
-        ws_chart2.cell(row=i, column=1, value=data["Capital_Labor_Ratio"])
-        ws_chart2.cell(row=i, column=2, value=data["Real_Exports"])
-
     # Create scatter chart
     scatter_chart = ScatterChart()
     scatter_chart.title = "Regression: Real Exports vs Capital-Labor Ratio"
@@ -200,8 +249,15 @@ def create_excel_with_charts():
     scatter_chart.y_axis.title = "Real Exports (Billions of Chained $)"
 
     # Add data
-    xvalues = Reference(ws_chart2, min_col=1, min_row=2, max_row=num_rows)
-    yvalues = Reference(ws_chart2, min_col=2, min_row=2, max_row=num_rows)
+    xvalues = Reference(
+        ws_data,
+        min_col=data_column("Capital_Labor_Ratio") + 1,
+        min_row=2,
+        max_row=num_rows,
+    )
+    yvalues = Reference(
+        ws_data, min_col=data_column("Real_Exports") + 1, min_row=2, max_row=num_rows
+    )
     series = Series(yvalues, xvalues, title="Observed Data")
     scatter_chart.series.append(series)
 
@@ -214,75 +270,76 @@ def create_excel_with_charts():
     series.marker.size = 7
     series.marker.graphicalProperties.solidFill = "1F77B4"
 
-    ws_chart2.add_chart(scatter_chart, "D2")
+    ws_chart2.add_chart(scatter_chart, "B2")
 
     # =========================================================================
     # Sheet 4: Summary Statistics
     # =========================================================================
     ws_summary = wb.create_sheet("Summary")
 
-    # Add summary statistics
-    ws_summary["A1"] = "Summary Statistics"
-    ws_summary["A1"].font = Font(bold=True, size=14)
-
-    stats = [
-        ("Variable", "Mean", "Std Dev", "Min", "Max"),
-        (
-            "Capital Deepening (%)",
-            df["Capital_Deepening_Pct"].mean(),
-            df["Capital_Deepening_Pct"].std(),
-            df["Capital_Deepening_Pct"].min(),
-            df["Capital_Deepening_Pct"].max(),
-        ),
-        (
-            "Capital-Labor Ratio ($)",
-            df["Capital_Labor_Ratio"].mean(),
-            df["Capital_Labor_Ratio"].std(),
-            df["Capital_Labor_Ratio"].min(),
-            df["Capital_Labor_Ratio"].max(),
-        ),
-        (
-            "Real Exports (Billions $)",
-            df["Real_Exports"].mean(),
-            df["Real_Exports"].std(),
-            df["Real_Exports"].min(),
-            df["Real_Exports"].max(),
-        ),
-        (
-            "Real GDP (Billions $)",
-            df["Real_GDP"].mean(),
-            df["Real_GDP"].std(),
-            df["Real_GDP"].min(),
-            df["Real_GDP"].max(),
-        ),
-    ]
-
-    for row_idx, row_data in enumerate(stats, 3):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws_summary.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-            if row_idx == 3:
-                cell.fill = header_fill
-                cell.font = header_font
-            elif col_idx > 1:
-                cell.number_format = "#,##0.00"
-
     # Adjust column widths
     ws_summary.column_dimensions["A"].width = 25
-    for col in ["B", "C", "D", "E"]:
-        ws_summary.column_dimensions[col].width = 15
+    for col in range(1, len(STAT_COLUMNS) + 1):
+        ws_summary.column_dimensions[column_letter(col)].width = 15
+
+    # Add summary statistics
+    title = WriteOnlyCell(ws_summary, value="Summary Statistics")
+    title.style = "ho_title"
+    ws_summary.append([title])
+    ws_summary.append([])
+
+    # All statistics come from one vectorized pass and are appended in bulk
+    summary = summarize(df, summary_variables)
+    ws_summary.append(_styled_row(ws_summary, summary.columns, "ho_header"))
+    _append_columns(
+        ws_summary,
+        [summary[column].to_numpy() for column in summary.columns],
+        ["ho_cell"]
+        + [
+            "ho_count" if column in COUNT_COLUMNS else "ho_number"
+            for column in STAT_COLUMNS
+        ],
+    )
+
+    # =========================================================================
+    # Sheet 5: Regression Results (only when a fitted model is handed over)
+    # =========================================================================
+    if model is not None:
+        ws_regression = wb.create_sheet(REGRESSION_SHEET)
+        ws_regression.column_dimensions["A"].width = 25
+        for col in ["B", "C", "D", "E"]:
+            ws_regression.column_dimensions[col].width = 15
+
+        title = WriteOnlyCell(ws_regression, value="OLS: Real Exports on K/L Ratio")
+        title.style = "ho_title"
+        ws_regression.append([title])
+        ws_regression.append([])
+
+        coefficients, fit = regression_tables(model)
+        for table in (coefficients, fit):
+            ws_regression.append(_styled_row(ws_regression, table.columns, "ho_header"))
+            _append_columns(
+                ws_regression,
+                [table[column].to_numpy() for column in table.columns],
+                ["ho_cell"] + ["ho_number"] * (len(table.columns) - 1),
+            )
+            ws_regression.append([])
 
     # =========================================================================
     # Save the workbook
     # =========================================================================
-    output_file = "heckscher_ohlin_charts.xlsx"
     wb.save(output_file)
+    if not verbose:
+        return output_file
+
     print(f"\n✓ Excel file saved: {output_file}")
     print("\nSheets created:")
     print("  1. Data - Complete dataset")
     print("  2. Dual-Axis Chart - Capital Deepening vs K/L Ratio")
     print("  3. Regression Plot - Real Exports vs K/L Ratio with trendline")
     print("  4. Summary - Summary statistics")
+    if model is not None:
+        print("  5. Regression - OLS coefficients and fit statistics")
 
     return output_file
 
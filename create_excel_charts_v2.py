@@ -3,16 +3,92 @@ Create Excel Charts for Heckscher-Ohlin Analysis using xlsxwriter
 This script generates an Excel file with proper dual-axis charts
 """
 
+import argparse
 import pandas as pd
 import xlsxwriter
 import os
 
+from excel_layout import (
+    DATA_HEADERS,
+    DATA_SHEET,
+    PERCENT_COLUMNS,
+    REGRESSION_SHEET,
+    data_columns,
+    data_range,
+    export_frame,
+    regression_tables,
+)
+from summary_statistics import COUNT_COLUMNS, STAT_COLUMNS, summarize
+
+# Fixed dual-axis chart scales for the U.S. series (Capital Deepening as a
+# fraction on the left axis, K/L in dollars per worker on the right)
+US_AXIS_BOUNDS = {"y": (0.10, 0.19), "y2": (5000, 25000)}
+
+
+def _add_formats(workbook):
+    """Build every cell format once so the writers below can share them."""
+    return {
+        "header": workbook.add_format(
+            {
+                "bold": True,
+                "font_color": "white",
+                "bg_color": "#4472C4",
+                "align": "center",
+                "border": 1,
+            }
+        ),
+        "cell": workbook.add_format({"border": 1, "num_format": "#,##0.00"}),
+        "count": workbook.add_format({"border": 1, "num_format": "#,##0"}),
+        "percent": workbook.add_format({"border": 1, "num_format": "0.00%"}),
+        "year": workbook.add_format({"border": 1, "align": "center"}),
+        "label": workbook.add_format({"border": 1}),
+        "title": workbook.add_format({"bold": True, "font_size": 14}),
+    }
+
+
+def _write_block(worksheet, first_row, columns, formats, constant_memory=False):
+    """
+    Write equal-length NumPy columns to a worksheet starting at column A.
+
+    In the default mode each column goes out with one write_column() call.
+    constant_memory mode flushes a row as soon as the next one is started, so
+    there the block is written row by row, with adjacent columns that share a
+    format grouped into a single write_row() call.
+    """
+    if not constant_memory:
+        for col, (values, fmt) in enumerate(zip(columns, formats)):
+            worksheet.write_column(first_row, col, values.tolist(), fmt)
+        return
 
-def create_excel_with_charts():
-    """Create Excel file with data and charts using xlsxwriter"""
+    # Runs of adjacent columns with the same format: (start, end, format)
+    runs = []
+    for col, fmt in enumerate(formats):
+        if runs and runs[-1][2] is fmt:
+            runs[-1][1] = col + 1
+        else:
+            runs.append([col, col + 1, fmt])
+
+    rows = zip(*(values.tolist() for values in columns))
+    for row_idx, row in enumerate(rows, first_row):
+        for start, end, fmt in runs:
+            worksheet.write_row(row_idx, start, row[start:end], fmt)
+
+
+def create_excel_with_charts(
+    csv_path="heckscher_ohlin_data.csv",
+    output_file="heckscher_ohlin_charts.xlsx",
+    constant_memory=False,
+    summary_variables=None,
+):
+    """
+    Create Excel file with data and charts using xlsxwriter
+
+    Set constant_memory=True to stream rows to disk as they are written, which
+    keeps memory flat for large panels. summary_variables lists the
+    (label, column) pairs for the Summary sheet (default: SUMMARY_VARIABLES).
+    """
 
     # Load the data
-    csv_path = "heckscher_ohlin_data.csv"
     if not os.path.exists(csv_path):
         print(
             f"Error: {csv_path} not found. Please run heckscher_ohlin_analysis.py first."
@@ -22,52 +98,64 @@ def create_excel_with_charts():
     df = pd.read_csv(csv_path)
     print(f"Loaded data with {len(df)} rows")
 
+    return export_workbook(
+        df,
+        output_file,
+        constant_memory=constant_memory,
+        summary_variables=summary_variables,
+        axis_bounds=US_AXIS_BOUNDS,
+    )
+
+
+def export_workbook(
+    df,
+    output_file,
+    constant_memory=False,
+    summary_variables=None,
+    entity_name="U.S.",
+    axis_bounds=None,
+    model=None,
+    verbose=True,
+):
+    """
+    Write the Data, chart and Summary sheets for one dataset to output_file.
+
+    df holds the DATA_HEADERS variables with Year as a column or as its index
+    (as returned by heckscher_ohlin_analysis.main()). entity_name is used in
+    the chart title; axis_bounds fixes the dual-axis chart scales (see
+    US_AXIS_BOUNDS) and is left to Excel's auto-scaling when None. Pass the
+    fitted OLS model to add a Regression sheet with its coefficients and fit
+    statistics.
+    """
+    df = export_frame(df)
+
     # Create workbook
-    output_file = "heckscher_ohlin_charts.xlsx"
-    workbook = xlsxwriter.Workbook(output_file, {"nan_inf_to_errors": True})
+    workbook = xlsxwriter.Workbook(
+        output_file,
+        {"nan_inf_to_errors": True, "constant_memory": constant_memory},
+    )
 
     # Formats
-    header_format = workbook.add_format(
-        {
-            "bold": True,
-            "font_color": "white",
-            "bg_color": "#4472C4",
-            "align": "center",
-            "border": 1,
-        }
-    )
-    cell_format = workbook.add_format({"border": 1, "num_format": "#,##0.00"})
-    percent_format = workbook.add_format({"border": 1, "num_format": "0.00%"})
-    year_format = workbook.add_format({"border": 1, "align": "center"})
+    formats = _add_formats(workbook)
+    header_format = formats["header"]
+    cell_format = formats["cell"]
+    percent_format = formats["percent"]
+    year_format = formats["year"]
 
     # =========================================================================
-    # Sheet 1: Data
+    # Sheet 1: Data - the only copy of the dataset; every chart points here
     # =========================================================================
-    ws_data = workbook.add_worksheet("Data")
-
-    headers = [
-        "Year",
-        "Real_GDP",
-        "Labor_Force",
-        "Real_Investment",
-        "Real_Exports",
-        "Capital_Deepening_Pct",
-        "Capital_Labor_Ratio",
-    ]
+    ws_data = workbook.add_worksheet(DATA_SHEET)
 
     # Write headers
-    for col, header in enumerate(headers):
-        ws_data.write(0, col, header, header_format)
-
-    # Write data
-    for row_idx, row in df.iterrows():
-        ws_data.write(row_idx + 1, 0, int(row["Year"]), year_format)
-        for col_idx, header in enumerate(headers[1:], 1):
-            # Capital Deepening column (index 5) - format as percentage
-            if header == "Capital_Deepening_Pct":
-                ws_data.write(row_idx + 1, col_idx, row[header] / 100, percent_format)
-            else:
-                ws_data.write(row_idx + 1, col_idx, row[header], cell_format)
+    ws_data.write_row(0, 0, DATA_HEADERS, header_format)
+
+    # Write data - percentage columns are stored as fractions for % display
+    column_formats = [year_format] + [
+        percent_format if header in PERCENT_COLUMNS else cell_format
+        for header in DATA_HEADERS[1:]
+    ]
+    _write_block(ws_data, 1, data_columns(df), column_formats, constant_memory)
 
     # Set column widths
     ws_data.set_column("A:A", 8)
@@ -78,23 +166,8 @@ def create_excel_with_charts():
     # =========================================================================
     ws_chart1 = workbook.add_worksheet("Dual-Axis Chart")
 
-    # Write data for the chart
-    ws_chart1.write(0, 0, "Year", header_format)
-    ws_chart1.write(0, 1, "Capital Deepening (%)", header_format)
-    ws_chart1.write(0, 2, "Capital-Labor Ratio ($)", header_format)
-
-    for row_idx, row in df.iterrows():
-        ws_chart1.write(row_idx + 1, 0, int(row["Year"]), year_format)
-        # Capital Deepening as percentage (divide by 100 for proper % display)
-        ws_chart1.write(
-            row_idx + 1, 1, row["Capital_Deepening_Pct"] / 100, percent_format
-        )
-        ws_chart1.write(row_idx + 1, 2, row["Capital_Labor_Ratio"], cell_format)
-
-    ws_chart1.set_column("A:A", 8)
-    ws_chart1.set_column("B:C", 22)
-
     num_rows = len(df)
+    first_year = int(df["Year"].min())
 
     # Create the dual-axis chart
     chart1 = workbook.add_chart({"type": "line"})
@@ -103,8 +176,8 @@ def create_excel_with_charts():
     chart1.add_series(
         {
             "name": "Capital Deepening (%)",
-            "categories": f"='Dual-Axis Chart'!$A$2:$A${num_rows + 1}",
-            "values": f"='Dual-Axis Chart'!$B$2:$B${num_rows + 1}",
+            "categories": data_range("Year", num_rows),
+            "values": data_range("Capital_Deepening_Pct", num_rows),
             "line": {"color": "#1F77B4", "width": 2.5},
             "marker": {
                 "type": "circle",
@@ -119,8 +192,8 @@ def create_excel_with_charts():
     chart1.add_series(
         {
             "name": "K/L Ratio ($)",
-            "categories": f"='Dual-Axis Chart'!$A$2:$A${num_rows + 1}",
-            "values": f"='Dual-Axis Chart'!$C$2:$C${num_rows + 1}",
+            "categories": data_range("Year", num_rows),
+            "values": data_range("Capital_Labor_Ratio", num_rows),
             "line": {"color": "#D62728", "width": 2.5},
             "marker": {
                 "type": "square",
@@ -135,7 +208,8 @@ def create_excel_with_charts():
     # Configure chart title (with subtitle)
     chart1.set_title(
         {
-            "name": "U.S. Capital Deepening and Capital-Labor Ratio (1960-Present)\nHeckscher-Ohlin Model Analysis",
+            "name": f"{entity_name} Capital Deepening and Capital-Labor Ratio"
+            f" ({first_year}-Present)\nHeckscher-Ohlin Model Analysis",
             "name_font": {"bold": True, "size": 14},
         }
     )
@@ -152,31 +226,29 @@ def create_excel_with_charts():
     )
 
     # Configure primary Y-axis (left) - Capital Deepening
-    chart1.set_y_axis(
-        {
-            "name": "Capital Deepening (Investment % of GDP)",
-            "name_font": {"color": "#1F77B4", "size": 11},
-            "num_font": {"color": "#1F77B4"},
-            "min": 0.10,
-            "max": 0.19,
-            "num_format": "0%",
-            "major_gridlines": {
-                "visible": True,
-                "line": {"color": "#D3D3D3", "dash_type": "solid"},
-            },
-        }
-    )
+    y_axis = {
+        "name": "Capital Deepening (Investment % of GDP)",
+        "name_font": {"color": "#1F77B4", "size": 11},
+        "num_font": {"color": "#1F77B4"},
+        "num_format": "0%",
+        "major_gridlines": {
+            "visible": True,
+            "line": {"color": "#D3D3D3", "dash_type": "solid"},
+        },
+    }
 
     # Configure secondary Y-axis (right) - K/L Ratio
-    chart1.set_y2_axis(
-        {
-            "name": "Capital-Labor Ratio ($ per Worker)",
-            "name_font": {"color": "#D62728", "size": 11},
-            "num_font": {"color": "#D62728"},
-            "min": 5000,
-            "max": 25000,
-        }
-    )
+    y2_axis = {
+        "name": "Capital-Labor Ratio ($ per Worker)",
+        "name_font": {"color": "#D62728", "size": 11},
+        "num_font": {"color": "#D62728"},
+    }
+
+    if axis_bounds is not None:
+        y_axis["min"], y_axis["max"] = axis_bounds["y"]
+        y2_axis["min"], y2_axis["max"] = axis_bounds["y2"]
+    chart1.set_y_axis(y_axis)
+    chart1.set_y2_axis(y2_axis)
 
     # Legend at top left
     chart1.set_legend({"position": "top", "font": {"size": 10}})
@@ -197,31 +269,21 @@ def create_excel_with_charts():
         }
     )
 
-    ws_chart1.insert_chart("E2", chart1)
+    ws_chart1.insert_chart("B2", chart1)
 
     # =========================================================================
     # Sheet 3: Regression Scatter Plot
     # =========================================================================
     ws_chart2 = workbook.add_worksheet("Regression Plot")
 
-    # Write data for scatter plot
-    ws_chart2.write(0, 0, "Capital-Labor Ratio ($)", header_format)
-    ws_chart2.write(0, 1, "Real Exports (Billions $)", header_format)
-
-    for row_idx, row in df.iterrows():
-        ws_chart2.write(row_idx + 1, 0, row["Capital_Labor_Ratio"], cell_format)
-        ws_chart2.write(row_idx + 1, 1, row["Real_Exports"], cell_format)
-
-    ws_chart2.set_column("A:B", 22)
-
     # Create scatter chart
     scatter_chart = workbook.add_chart({"type": "scatter"})
 
     scatter_chart.add_series(
         {
             "name": "Observed Data",
-            "categories": f"='Regression Plot'!$A$2:$A${num_rows + 1}",
-            "values": f"='Regression Plot'!$B$2:$B${num_rows + 1}",
+            "categories": data_range("Capital_Labor_Ratio", num_rows),
+            "values": data_range("Real_Exports", num_rows),
             "marker": {"type": "circle", "size": 6, "fill": {"color": "#1F77B4"}},
             "trendline": {
                 "type": "linear",
@@ -238,43 +300,61 @@ def create_excel_with_charts():
     scatter_chart.set_legend({"position": "bottom"})
     scatter_chart.set_size({"width": 720, "height": 480})
 
-    ws_chart2.insert_chart("D2", scatter_chart)
+    ws_chart2.insert_chart("B2", scatter_chart)
 
     # =========================================================================
     # Sheet 4: Summary Statistics
     # =========================================================================
     ws_summary = workbook.add_worksheet("Summary")
 
-    ws_summary.write(
-        0, 0, "Summary Statistics", workbook.add_format({"bold": True, "font_size": 14})
+    ws_summary.write(0, 0, "Summary Statistics", formats["title"])
+
+    # All statistics come from one vectorized pass and are written in bulk
+    summary = summarize(df, summary_variables)
+    ws_summary.write_row(2, 0, list(summary.columns), header_format)
+    _write_block(
+        ws_summary,
+        3,
+        [summary[column].to_numpy() for column in summary.columns],
+        [cell_format]
+        + [
+            formats["count"] if column in COUNT_COLUMNS else cell_format
+            for column in STAT_COLUMNS
+        ],
+        constant_memory,
     )
 
-    # Headers
-    summary_headers = ["Variable", "Mean", "Std Dev", "Min", "Max"]
-    for col, header in enumerate(summary_headers):
-        ws_summary.write(2, col, header, header_format)
-
-    # Data
-    variables = [
-        ("Capital Deepening (%)", "Capital_Deepening_Pct"),
-        ("Capital-Labor Ratio ($)", "Capital_Labor_Ratio"),
-        ("Real Exports (Billions $)", "Real_Exports"),
-        ("Real GDP (Billions $)", "Real_GDP"),
-    ]
-
-    for row_idx, (name, col_name) in enumerate(variables, 3):
-        ws_summary.write(row_idx, 0, name, cell_format)
-        ws_summary.write(row_idx, 1, df[col_name].mean(), cell_format)
-        ws_summary.write(row_idx, 2, df[col_name].std(), cell_format)
-        ws_summary.write(row_idx, 3, df[col_name].min(), cell_format)
-        ws_summary.write(row_idx, 4, df[col_name].max(), cell_format)
-
     ws_summary.set_column("A:A", 25)
-    ws_summary.set_column("B:E", 15)
+    ws_summary.set_column(1, len(STAT_COLUMNS), 15)
+
+    # =========================================================================
+    # Sheet 5: Regression Results (only when a fitted model is handed over)
+    # =========================================================================
+    if model is not None:
+        ws_regression = workbook.add_worksheet(REGRESSION_SHEET)
+        ws_regression.write(0, 0, "OLS: Real Exports on K/L Ratio", formats["title"])
+
+        row = 2
+        for table in regression_tables(model):
+            ws_regression.write_row(row, 0, list(table.columns), header_format)
+            _write_block(
+                ws_regression,
+                row + 1,
+                [table[column].to_numpy() for column in table.columns],
+                [formats["label"]] + [cell_format] * (len(table.columns) - 1),
+                constant_memory,
+            )
+            row += len(table) + 2
+
+        ws_regression.set_column("A:A", 25)
+        ws_regression.set_column("B:E", 15)
 
     # Close workbook
     workbook.close()
 
+    if not verbose:
+        return output_file
+
     print(f"\n✓ Excel file saved: {output_file}")
     print("\nSheets created:")
     print("  1. Data - Complete dataset")
@@ -283,9 +363,18 @@ def create_excel_with_charts():
     )
     print("  3. Regression Plot - Real Exports vs K/L Ratio with trendline")
     print("  4. Summary - Summary statistics")
+    if model is not None:
+        print("  5. Regression - OLS coefficients and fit statistics")
 
     return output_file
 
 
 if __name__ == "__main__":
-    create_excel_with_charts()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--constant-memory",
+        action="store_true",
+        help="stream rows to disk instead of holding the workbook in memory",
+    )
+    args = parser.parse_args()
+    create_excel_with_charts(constant_memory=args.constant_memory)
@@ -0,0 +1,110 @@
+"""
+Shared Workbook Layout for the Excel Exporters
+Both create_excel_charts.py (openpyxl) and create_excel_charts_v2.py
+(xlsxwriter) write the dataset once to the Data sheet and point every chart
+series at ranges on it, so the sheet layout is defined here.
+"""
+
+import numpy as np
+import pandas as pd
+
+DATA_SHEET = "Data"
+REGRESSION_SHEET = "Regression"
+
+DATA_HEADERS = [
+    "Year",
+    "Real_GDP",
+    "Labor_Force",
+    "Real_Investment",
+    "Real_Exports",
+    "Capital_Deepening_Pct",
+    "Capital_Labor_Ratio",
+]
+
+# Columns stored as fractions so Excel can display them with a % format
+PERCENT_COLUMNS = ["Capital_Deepening_Pct"]
+
+
+def column_letter(index):
+    """Convert a 0-based column index to an Excel column letter (0 -> A)."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def data_column(header):
+    """0-based position of a variable on the Data sheet."""
+    return DATA_HEADERS.index(header)
+
+
+def data_range(header, num_rows):
+    """
+    Absolute reference to the values of a Data sheet column.
+
+    Row 1 holds the headers, so the values span rows 2 to num_rows + 1,
+    e.g. data_range("Year", 65) -> ='Data'!$A$2:$A$66
+    """
+    letter = column_letter(data_column(header))
+    return f"='{DATA_SHEET}'!${letter}$2:${letter}${num_rows + 1}"
+
+
+def export_frame(df):
+    """
+    Return df with Year as a column.
+
+    The analysis pipeline keeps Year as the index while the CSV round trip
+    turns it into a column; the exporters accept either.
+    """
+    if "Year" in df.columns:
+        return df
+    return df.reset_index()
+
+
+def data_columns(df):
+    """
+    Return the Data sheet columns of df as float64 NumPy arrays (Year as int).
+
+    Percentage columns are divided by 100 so they can carry a % number format.
+    """
+    columns = []
+    for header in DATA_HEADERS:
+        if header == "Year":
+            columns.append(df[header].to_numpy(dtype=np.int64))
+        elif header in PERCENT_COLUMNS:
+            columns.append(df[header].to_numpy(dtype=np.float64) / 100)
+        else:
+            columns.append(df[header].to_numpy(dtype=np.float64))
+    return columns
+
+
+def regression_tables(model):
+    """
+    Coefficient and fit-statistic tables for a fitted statsmodels OLS model.
+
+    Returns (coefficients, fit) DataFrames in the layout of the Regression
+    sheet.
+    """
+    coefficients = pd.DataFrame(
+        {
+            "Term": [str(term) for term in model.params.index],
+            "Coefficient": np.asarray(model.params, dtype=np.float64),
+            "Std Error": np.asarray(model.bse, dtype=np.float64),
+            "t Statistic": np.asarray(model.tvalues, dtype=np.float64),
+            "P-Value": np.asarray(model.pvalues, dtype=np.float64),
+        }
+    )
+    fit = pd.DataFrame(
+        {
+            "Statistic": ["R-squared", "Adj. R-squared", "F-statistic", "Observations"],
+            "Value": [
+                float(model.rsquared),
+                float(model.rsquared_adj),
+                float(model.fvalue),
+                float(model.nobs),
+            ],
+        }
+    )
+    return coefficients, fit
@@ -0,0 +1,275 @@
+"""
+Incrementally Update an Existing Heckscher-Ohlin Workbook
+Appends the years that are not yet on the Data sheet, extends every chart
+series range to cover them and recomputes the Summary statistics - without
+regenerating the workbook.
+
+Only three kinds of parts inside the .xlsx package are rewritten: the Data
+sheet, the Summary sheet and the charts that reference the Data sheet. All
+other sheets, styles and drawings are copied through unchanged. Works on
+workbooks produced by either create_excel_charts.py or
+create_excel_charts_v2.py, since both share the layout in excel_layout.py.
+"""
+
+import argparse
+import math
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from excel_layout import (
+    DATA_HEADERS,
+    DATA_SHEET,
+    PERCENT_COLUMNS,
+    column_letter,
+    data_columns,
+)
+from summary_statistics import STAT_COLUMNS, summarize
+
+SUMMARY_SHEET = "Summary"
+
+# Row (1-based) of the first variable on the Summary sheet: title, blank, header
+SUMMARY_FIRST_ROW = 4
+
+ROW_PATTERN = re.compile(r'<row r="(\d+)"[^>]*?(?:/>|>(.*?)</row>)', re.DOTALL)
+CELL_PATTERN = re.compile(r'<c r="([A-Z]+)\d+"([^>]*?)(?:/>|>(.*?)</c>)', re.DOTALL)
+VALUE_PATTERN = re.compile(r"<v>([^<]*)</v>")
+STYLE_PATTERN = re.compile(r'\bs="(\d+)"')
+SHEET_PATTERN = re.compile(r"<sheet\b[^>]*>")
+NUM_CACHE_PATTERN = re.compile(r"<(?:c:)?numCache>.*?</(?:c:)?numCache>", re.DOTALL)
+
+
+def _sheet_parts(archive):
+    """Map sheet names to their XML part names inside the package."""
+    rels = archive.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    targets = {}
+    for rel in re.findall(r"<Relationship\b[^>]*>", rels):
+        rel_id = re.search(r'\bId="([^"]+)"', rel).group(1)
+        target = re.search(r'\bTarget="([^"]+)"', rel).group(1)
+        if target.startswith("/"):
+            targets[rel_id] = target.lstrip("/")
+        else:
+            targets[rel_id] = posixpath.normpath(posixpath.join("xl", target))
+
+    workbook = archive.read("xl/workbook.xml").decode("utf-8")
+    parts = {}
+    for sheet in SHEET_PATTERN.findall(workbook):
+        name = re.search(r'\bname="([^"]+)"', sheet).group(1)
+        rel_id = re.search(r'\br:id="([^"]+)"', sheet).group(1)
+        parts[name] = targets[rel_id]
+    return parts
+
+
+def _parse_data_rows(sheet_xml):
+    """
+    Read the numeric rows of the Data sheet.
+
+    Returns (row_numbers, values, styles) where values is a float array with
+    one column per DATA_HEADERS entry (NaN for empty or error cells) and
+    styles maps column letters to the style ids of the first data row.
+    """
+    letters = [column_letter(i) for i in range(len(DATA_HEADERS))]
+    position = {letter: i for i, letter in enumerate(letters)}
+    row_numbers, values, styles = [], [], {}
+
+    for match in ROW_PATTERN.finditer(sheet_xml):
+        row_number = int(match.group(1))
+        if row_number == 1:
+            continue  # header row
+        row = [np.nan] * len(letters)
+        for letter, attributes, body in CELL_PATTERN.findall(match.group(2) or ""):
+            if letter not in position:
+                continue
+            if not styles.get(letter) and STYLE_PATTERN.search(attributes):
+                styles[letter] = STYLE_PATTERN.search(attributes).group(1)
+            value = VALUE_PATTERN.search(body or "")
+            try:
+                row[position[letter]] = float(value.group(1))
+            except (AttributeError, ValueError):
+                pass  # empty cell or an error value such as #NUM!
+        row_numbers.append(row_number)
+        values.append(row)
+
+    return row_numbers, np.array(values).reshape(-1, len(letters)), styles
+
+
+def _number(value):
+    """XML text for a numeric cell value."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _nan_as_error(archive):
+    """
+    True if missing values are #NUM! errors in this workbook.
+
+    create_excel_charts_v2.py (xlsxwriter, nan_inf_to_errors) writes NaN as
+    #NUM!, while create_excel_charts.py (openpyxl) leaves the cell empty.
+    """
+    try:
+        app = archive.read("docProps/app.xml").decode("utf-8")
+    except KeyError:
+        return True
+    return "openpyxl" not in app.lower()
+
+
+def _cell_xml(ref, value, style, nan_as_error=True):
+    style_attr = f' s="{style}"' if style else ""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        if nan_as_error:
+            return f'<c r="{ref}"{style_attr} t="e"><f>#NUM!</f><v>#NUM!</v></c>'
+        return f'<c r="{ref}"{style_attr}/>'
+    return f'<c r="{ref}"{style_attr}><v>{_number(value)}</v></c>'
+
+
+def _rows_xml(columns, first_row, styles, nan_as_error=True):
+    """Serialize Data sheet rows for the new observations."""
+    letters = [column_letter(i) for i in range(len(columns))]
+    span = f"1:{len(columns)}"
+    rows = []
+    lists = [values.tolist() for values in columns]
+    for row_number, values in enumerate(zip(*lists), first_row):
+        cells = "".join(
+            _cell_xml(f"{letter}{row_number}", value, styles.get(letter), nan_as_error)
+            for letter, value in zip(letters, values)
+        )
+        rows.append(f'<row r="{row_number}" spans="{span}">{cells}</row>')
+    return "".join(rows)
+
+
+def _extend_chart_ranges(chart_xml, old_end, new_end):
+    """Point Data sheet ranges ending at old_end to new_end."""
+    pattern = re.compile(
+        rf"((?:'{DATA_SHEET}'|{DATA_SHEET})!\$[A-Z]+\$2:\$[A-Z]+\$){old_end}\b"
+    )
+    updated, count = pattern.subn(rf"\g<1>{new_end}", chart_xml)
+    if count:
+        # Cached point values are stale now; Excel rebuilds them on open
+        updated = NUM_CACHE_PATTERN.sub("", updated)
+    return updated
+
+
+def _patch_summary(sheet_xml, summary, nan_as_error=True):
+    """Overwrite the statistic cells of the Summary sheet in place."""
+    for offset, row in enumerate(summary[STAT_COLUMNS].to_numpy()):
+        row_number = SUMMARY_FIRST_ROW + offset
+        for col, value in enumerate(row, 1):
+            ref = f"{column_letter(col)}{row_number}"
+            pattern = re.compile(rf'<c r="{ref}"([^>]*?)(?:/>|>.*?</c>)', re.DOTALL)
+            match = pattern.search(sheet_xml)
+            if match is None:
+                raise ValueError(f"Summary sheet has no cell {ref}")
+            style = STYLE_PATTERN.search(match.group(1))
+            cell = _cell_xml(
+                ref, value, style.group(1) if style else None, nan_as_error
+            )
+            sheet_xml = sheet_xml[: match.start()] + cell + sheet_xml[match.end() :]
+    return sheet_xml
+
+
+def update_excel_workbook(df, workbook_path, summary_variables=None):
+    """
+    Bring an existing workbook up to date with df.
+
+    Rows of df whose Year is later than the last complete row of the Data
+    sheet are appended; trailing rows with missing values (e.g. a partial
+    year) are treated as provisional and replaced. summary_variables must
+    match the list the workbook was created with. Missing values are written
+    the way the workbook's exporter writes them (#NUM! or an empty cell).
+    Returns the number of rows written.
+    """
+    if "Year" not in df.columns:
+        df = df.reset_index()
+
+    with zipfile.ZipFile(workbook_path) as archive:
+        parts = _sheet_parts(archive)
+        data_part = parts[DATA_SHEET]
+        summary_part = parts[SUMMARY_SHEET]
+        data_xml = archive.read(data_part).decode("utf-8")
+        nan_as_error = _nan_as_error(archive)
+
+        row_numbers, existing, styles = _parse_data_rows(data_xml)
+        complete = ~np.isnan(existing).any(axis=1)
+        keep = int(np.nonzero(complete)[0][-1]) + 1 if complete.any() else 0
+        last_year = existing[keep - 1, 0] if keep else -np.inf
+
+        new_rows = df[df["Year"] > last_year].sort_values("Year")
+        if new_rows.empty:
+            print(f"✓ {workbook_path} is already up to date")
+            return 0
+
+        # Drop provisional rows, then append the new observations
+        old_end = row_numbers[-1] if row_numbers else 1
+        sheet_data_end = data_xml.index("</sheetData>")
+        if keep < len(row_numbers):
+            cut = data_xml.index(f'<row r="{row_numbers[keep]}"')
+        else:
+            cut = sheet_data_end
+        columns = data_columns(new_rows)
+        first_new = (row_numbers[keep - 1] if keep else 1) + 1
+        new_end = first_new + len(new_rows) - 1
+        data_xml = (
+            data_xml[:cut]
+            + _rows_xml(columns, first_new, styles, nan_as_error)
+            + data_xml[sheet_data_end:]
+        )
+        data_xml = re.sub(
+            r'(<dimension ref="A1:[A-Z]+)\d+(")', rf"\g<1>{new_end}\g<2>", data_xml
+        )
+
+        # Summary statistics over the kept rows plus the appended ones
+        combined = pd.DataFrame(
+            np.vstack([existing[:keep], np.column_stack(columns)]),
+            columns=DATA_HEADERS,
+        )
+        for header in PERCENT_COLUMNS:
+            combined[header] *= 100
+        summary_xml = _patch_summary(
+            archive.read(summary_part).decode("utf-8"),
+            summarize(combined, summary_variables),
+            nan_as_error,
+        )
+
+        replacements = {data_part: data_xml, summary_part: summary_xml}
+        for name in archive.namelist():
+            if name.startswith("xl/charts/chart") and name.endswith(".xml"):
+                chart_xml = archive.read(name).decode("utf-8")
+                updated = _extend_chart_ranges(chart_xml, old_end, new_end)
+                if updated != chart_xml:
+                    replacements[name] = updated
+
+        # Copy every part into a new package, swapping in the patched ones
+        fd, tmp_path = tempfile.mkstemp(
+            suffix=".xlsx", dir=os.path.dirname(os.path.abspath(workbook_path))
+        )
+        os.close(fd)
+        with zipfile.ZipFile(tmp_path, "w") as output:
+            for info in archive.infolist():
+                if info.filename in replacements:
+                    output.writestr(info, replacements[info.filename].encode("utf-8"))
+                else:
+                    output.writestr(info, archive.read(info))
+
+    os.replace(tmp_path, workbook_path)
+    print(f"✓ Appended {len(new_rows)} rows to {workbook_path}")
+    return len(new_rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default="heckscher_ohlin_data.csv")
+    parser.add_argument("--workbook", default="heckscher_ohlin_charts.xlsx")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.workbook):
+        print(
+            f"Error: {args.workbook} not found. "
+            "Please run create_excel_charts_v2.py first."
+        )
+    else:
+        update_excel_workbook(pd.read_csv(args.csv), args.workbook)
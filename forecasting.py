@@ -0,0 +1,265 @@
+"""
+Multi-Series Forecasting with Warm-Started Parameters
+Fits ARIMA and ETS models to every series (and every entity of a panel) and
+forecasts them a number of years ahead. Models are fitted on the log of each
+series, so forecasts and their 95% intervals stay positive.
+
+    arima   ARIMA(1,1,1) with drift (state space MLE)
+    ets     additive-error ETS with a damped additive trend
+
+Fits are spread over worker processes. The estimated parameters of every
+(entity, series, model) are saved to a JSON cache and passed as start_params
+on the next run; after new years arrive the optimizer starts next to the
+optimum and converges in a few iterations instead of ~20.
+
+The result is a long table - Entity (panels only), Series, Model, Year,
+Forecast, Lower, Upper - ready for charting or pivoting.
+
+Usage:
+    python forecasting.py --horizon 10 --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FORECAST_SERIES = [
+    "Real_Exports",
+    "Capital_Labor_Ratio",
+    "Capital_Deepening_Pct",
+    "Real_GDP",
+    "Real_Investment",
+    "Labor_Force",
+]
+
+MODELS = ["arima", "ets"]
+
+DEFAULT_CACHE = ".forecast_params.json"
+ALPHA = 0.05
+
+# Shortest history a model is fitted to
+MIN_OBSERVATIONS = 10
+
+
+def _build_model(name, y):
+    if name == "arima":
+        from statsmodels.tsa.arima.model import ARIMA
+
+        return ARIMA(y, order=(1, 1, 1), trend="t")
+    if name == "ets":
+        from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+        return ETSModel(y, error="add", trend="add", damped_trend=True)
+    raise ValueError(f"Unknown model '{name}'; choose from {MODELS}")
+
+
+def _fit(model, name, start_params):
+    if name == "arima":
+        return model.fit(
+            start_params=start_params, method="statespace", method_kwargs={"disp": 0}
+        )
+    return model.fit(start_params=start_params, disp=False)
+
+
+def _fit_task(task):
+    """
+    Worker: fit one model to one series and forecast it.
+
+    task is (key, labels, years, values, horizon, cached entry or None),
+    where labels holds the entity, series and model names. Returns (key,
+    labels, forecast columns, fit record with the parameters to cache).
+    """
+    key, labels, years, values, horizon, cached = task
+    name = labels["Model"]
+    y = pd.Series(np.log(values), index=pd.RangeIndex(len(values)))
+    model = _build_model(name, y)
+
+    start_params = None
+    if cached is not None and cached["param_names"] == list(model.param_names):
+        start_params = np.asarray(cached["params"], dtype=np.float64)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            result = _fit(model, name, start_params)
+        except (ValueError, np.linalg.LinAlgError):
+            if start_params is None:
+                raise
+            # A stale warm start can be infeasible; fall back to a cold fit
+            start_params = None
+            result = _fit(model, name, None)
+
+        if name == "arima":
+            prediction = result.get_forecast(horizon).summary_frame(alpha=ALPHA)
+            lower, upper = prediction["mean_ci_lower"], prediction["mean_ci_upper"]
+        else:
+            prediction = result.get_prediction(
+                start=len(y), end=len(y) + horizon - 1
+            ).summary_frame(alpha=ALPHA)
+            lower, upper = prediction["pi_lower"], prediction["pi_upper"]
+
+    retvals = result.mle_retvals or {}
+    forecast = {
+        "Year": years[-1] + np.arange(1, horizon + 1),
+        "Forecast": np.exp(prediction["mean"].to_numpy()),
+        "Lower": np.exp(lower.to_numpy()),
+        "Upper": np.exp(upper.to_numpy()),
+    }
+    fit = {
+        "param_names": list(model.param_names),
+        "params": [float(p) for p in np.asarray(result.params)],
+        "last_year": int(years[-1]),
+        "iterations": int(retvals.get("iterations", -1)),
+        "converged": bool(retvals.get("converged", True)),
+        "warm_start": start_params is not None,
+        "aic": float(result.aic),
+    }
+    return key, labels, forecast, fit
+
+
+def load_cache(path=DEFAULT_CACHE):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache, path=DEFAULT_CACHE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _series_tasks(df, series, models, horizon, cache, entity_col):
+    """One task per (entity, series, model) with enough observations."""
+    if "Year" in df.columns:
+        df = df.set_index("Year")
+    groups = df.groupby(entity_col, sort=True) if entity_col else [(None, df)]
+    tasks = []
+    for entity, frame in groups:
+        frame = frame.sort_index()
+        for column in series:
+            values = frame[column].dropna()
+            values = values[values > 0]
+            if len(values) < MIN_OBSERVATIONS:
+                continue
+            years = values.index.to_numpy(dtype=np.int64)
+            for name in models:
+                labels = {"Series": column, "Model": name}
+                key = f"{column}/{name}"
+                if entity_col:
+                    labels = {entity_col: entity, **labels}
+                    key = f"{entity}/{key}"
+                tasks.append(
+                    (
+                        key,
+                        labels,
+                        years,
+                        values.to_numpy(dtype=np.float64),
+                        horizon,
+                        cache.get(key),
+                    )
+                )
+    return tasks
+
+
+def forecast(
+    df,
+    series=None,
+    models=None,
+    horizon=10,
+    cache_path=DEFAULT_CACHE,
+    max_workers=None,
+    entity_col=None,
+):
+    """
+    Forecast every series of df with every model, warm-starting from cache.
+
+    entity_col names the panel entity column (default: "Entity" when df has
+    one). cache_path=None disables the parameter cache. Returns the long
+    forecast table; its attrs["fits"] holds one row per fitted model with
+    the optimizer iterations and whether it was warm-started.
+    """
+    series = series or FORECAST_SERIES
+    models = models or MODELS
+    if entity_col is None and "Entity" in df.columns:
+        entity_col = "Entity"
+    cache = load_cache(cache_path)
+    tasks = _series_tasks(df, series, models, horizon, cache, entity_col)
+
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_fit_task(task) for task in tasks]
+    else:
+        n_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(
+                pool.map(
+                    _fit_task, tasks, chunksize=max(1, len(tasks) // (4 * n_workers))
+                )
+            )
+
+    frames, fits = [], []
+    for key, labels, values, fit in results:
+        frames.append(pd.DataFrame({**labels, **values}))
+        fits.append({**labels, **{k: fit[k] for k in fit if k != "params"}})
+        cache[key] = {k: fit[k] for k in ("param_names", "params", "last_year")}
+
+    if cache_path:
+        save_cache(cache, cache_path)
+
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    table.attrs["fits"] = pd.DataFrame(fits).drop(
+        columns="param_names", errors="ignore"
+    )
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--csv", default="heckscher_ohlin_data.csv")
+    parser.add_argument("--horizon", type=int, default=10)
+    parser.add_argument("--series", nargs="+", default=FORECAST_SERIES)
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=MODELS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="parameter cache")
+    parser.add_argument("--no-cache", action="store_true", help="always fit cold")
+    parser.add_argument("--output", default="forecasts.csv")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+
+    start = time.perf_counter()
+    table = forecast(
+        df,
+        args.series,
+        args.models,
+        args.horizon,
+        cache_path=None if args.no_cache else args.cache,
+        max_workers=args.workers,
+    )
+    seconds = time.perf_counter() - start
+    fits = table.attrs["fits"]
+
+    print("=" * 70)
+    print(f"FORECASTS ({args.horizon} years ahead, 95% intervals)")
+    print("=" * 70)
+    final = table[table["Year"] == table["Year"].max()]
+    print(final.round(2).to_string(index=False))
+    print(
+        f"\n✓ {len(fits)} models fitted in {seconds:.2f}s "
+        f"({int(fits['warm_start'].sum())} warm-started, "
+        f"{fits['iterations'].mean():.1f} iterations on average)"
+    )
+    if not fits["converged"].all():
+        print(f"  ✗ {int((~fits['converged']).sum())} fits did not converge")
+    table.to_csv(args.output, index=False)
+    print(f"✓ Forecasts saved to: {args.output}")
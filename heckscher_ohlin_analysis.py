@@ -16,6 +16,9 @@ import statsmodels.api as sm
 from datetime import datetime
 import warnings
 
+from profiling import Profiler, measure, profiled
+from validation import MODES as VALIDATION_MODES, ValidationError, validate_frame
+
 warnings.filterwarnings("ignore")
 
 # Try to use fredapi if available, otherwise use requests
@@ -32,8 +35,11 @@ except ImportError:
 # Part 1: Data Acquisition from FRED
 # =============================================================================
 
+FRED_BASE_URL = "https://fred.stlouisfed.org"
+
 
-def download_fred_data(start_date="1960-01-01", end_date=None):
+@profiled
+def download_fred_data(start_date="1960-01-01", end_date=None, base_url=FRED_BASE_URL):
     """
     Download the required FRED data series.
 
@@ -42,6 +48,9 @@ def download_fred_data(start_date="1960-01-01", end_date=None):
     - CLF16OV: Civilian Labor Force (Thousands of Persons) - converted to annual
     - GPDIC1: Real Gross Private Domestic Investment (Billions of Chained Dollars)
     - EXPGSC1: Real Exports of Goods & Services (Billions of Chained Dollars)
+
+    base_url points the CSV downloads at another host, e.g. a local stand-in
+    server for benchmarks.
     """
     if end_date is None:
         end_date = datetime.today().strftime("%Y-%m-%d")
@@ -66,7 +75,7 @@ def download_fred_data(start_date="1960-01-01", end_date=None):
             url = f"https://api.stlouisfed.org/fred/series/observations?series_id={fred_code}&file_type=json&observation_start={start_date}&observation_end={end_date}"
 
             # Try direct CSV download first (public access)
-            csv_url = f"https://fred.stlouisfed.org/graph/fredgraph.csv?bgcolor=%23e1e9f0&chart_type=line&drp=0&fo=open%20sans&graph_bgcolor=%23ffffff&height=450&mode=fred&recession_bars=on&txtcolor=%23444444&ts=12&tts=12&width=1318&nt=0&thu=0&trc=0&show_legend=yes&show_axis_titles=yes&show_tooltip=yes&id={fred_code}&scale=left&cosd={start_date}&coed={end_date}&line_color=%234572a7&link_values=false&line_style=solid&mark_type=none&mw=3&lw=2&ost=-99999&oet=99999&mma=0&fml=a&fq=Annual&fam=avg&fgst=lin&fgsnd=2020-02-01&line_index=1&transformation=lin&vintage_date={end_date}&revision_date={end_date}&nd=1947-01-01"
+            csv_url = f"{base_url}/graph/fredgraph.csv?bgcolor=%23e1e9f0&chart_type=line&drp=0&fo=open%20sans&graph_bgcolor=%23ffffff&height=450&mode=fred&recession_bars=on&txtcolor=%23444444&ts=12&tts=12&width=1318&nt=0&thu=0&trc=0&show_legend=yes&show_axis_titles=yes&show_tooltip=yes&id={fred_code}&scale=left&cosd={start_date}&coed={end_date}&line_color=%234572a7&link_values=false&line_style=solid&mark_type=none&mw=3&lw=2&ost=-99999&oet=99999&mma=0&fml=a&fq=Annual&fam=avg&fgst=lin&fgsnd=2020-02-01&line_index=1&transformation=lin&vintage_date={end_date}&revision_date={end_date}&nd=1947-01-01"
 
             df = pd.read_csv(csv_url)
             # Rename first column to DATE if it's not already
@@ -400,7 +409,8 @@ def create_sample_data():
 # =============================================================================
 
 
-def calculate_variables(df):
+@profiled
+def calculate_variables(df, verbose=True):
     """
     Calculate Capital Deepening and Capital-Labor Ratio.
 
@@ -415,8 +425,12 @@ def calculate_variables(df):
         - Labor Force: Thousands → Persons (multiply by 1,000)
 
         Result: Dollars of Investment per Worker
+
+    verbose=False suppresses the progress messages, e.g. when the function
+    is applied to many chunks of a large panel.
     """
-    print("\nCalculating derived variables...")
+    if verbose:
+        print("\nCalculating derived variables...")
 
     # Capital Deepening (Investment as % of GDP)
     df["Capital_Deepening_Pct"] = (df["Real_Investment"] / df["Real_GDP"]) * 100
@@ -430,22 +444,59 @@ def calculate_variables(df):
         df["Labor_Force"] * 1e3
     )
 
-    print("  ✓ Capital Deepening (Investment % of GDP)")
-    print("  ✓ Capital-Labor Ratio ($ per Worker)")
+    if verbose:
+        print("  ✓ Capital Deepening (Investment % of GDP)")
+        print("  ✓ Capital-Labor Ratio ($ per Worker)")
 
     return df
 
 
+def display_data(df):
+    """Print the first and last 10 years of the computed variables."""
+    print("\n" + "=" * 70)
+    print("CALCULATED DATA (First 10 and Last 10 years)")
+    print("=" * 70)
+    display_cols = [
+        "Real_GDP",
+        "Labor_Force",
+        "Real_Investment",
+        "Real_Exports",
+        "Capital_Deepening_Pct",
+        "Capital_Labor_Ratio",
+    ]
+    print("\nFirst 10 years:")
+    print(df[display_cols].head(10).round(2))
+    print("\nLast 10 years:")
+    print(df[display_cols].tail(10).round(2))
+
+
 # =============================================================================
 # Part 3: Visualization - Dual-Axis Chart
 # =============================================================================
 
+# Default chart shading: (start, end, label, color)
+KEY_PERIODS = [
+    (2007, 2009, "Great Recession", "gray"),
+    (2020, 2021, "COVID-19", "orange"),
+]
+
 
-def create_dual_axis_chart(df, save_path="capital_deepening_chart.png"):
+@profiled
+def create_dual_axis_chart(
+    df, save_path="capital_deepening_chart.png", show=True, fan=None, shade=None
+):
     """
     Create a dual-axis line chart:
     - Left Axis: Capital Deepening (Investment as % of GDP)
     - Right Axis: Capital-Labor Ratio (K/L)
+
+    Pass save_path=None to keep the figure in memory only. fan is an optional
+    projection fan from projections.project(), drawn as 50% and 90% bands
+    around the median path of each series.
+
+    shade lists the (start, end, label, color) periods to shade and defaults
+    to KEY_PERIODS; structural_breaks.shaded_periods() builds it from the
+    detected regimes. Pass shade=[] for no shading.
     """
     print("\nCreating dual-axis visualization...")
 
@@ -482,6 +533,32 @@ def create_dual_axis_chart(df, save_path="capital_deepening_chart.png"):
     )
     ax2.tick_params(axis="y", labelcolor=color2)
 
+    # Projection fans
+    if fan is not None:
+        for ax, variable, color, label in [
+            (ax1, "Capital_Deepening_Pct", color1, "Capital Deepening projection"),
+            (ax2, "Capital_Labor_Ratio", color2, "K/L projection"),
+        ]:
+            band = fan[fan["Variable"] == variable]
+            ax.fill_between(
+                band["Year"], band["P5"], band["P95"], color=color, alpha=0.1
+            )
+            ax.fill_between(
+                band["Year"], band["P25"], band["P75"], color=color, alpha=0.2
+            )
+            ax.plot(
+                band["Year"],
+                band["P50"],
+                color=color,
+                linewidth=1.5,
+                linestyle="--",
+                label=f"{label} (median, 50%/90% bands)",
+            )
+
+    # Shaded periods (before the legend so they are labelled)
+    for start, end, label, color in KEY_PERIODS if shade is None else shade:
+        ax1.axvspan(start, end, alpha=0.2, color=color, label=label)
+
     # Title and legend
     plt.title(
         "U.S. Capital Deepening and Capital-Labor Ratio (1960-Present)\n"
@@ -495,14 +572,12 @@ def create_dual_axis_chart(df, save_path="capital_deepening_chart.png"):
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax1.legend(lines1 + lines2, labels1 + labels2, loc="upper left", fontsize=10)
 
-    # Add annotations for key periods
-    ax1.axvspan(2007, 2009, alpha=0.2, color="gray", label="Great Recession")
-    ax1.axvspan(2020, 2021, alpha=0.2, color="orange", label="COVID-19")
-
     plt.tight_layout()
-    plt.savefig(save_path, dpi=300, bbox_inches="tight")
-    plt.show()
-    print(f"  ✓ Chart saved to: {save_path}")
+    if save_path is not None:
+        plt.savefig(save_path, dpi=300, bbox_inches="tight")
+        print(f"  ✓ Chart saved to: {save_path}")
+    if show:
+        plt.show()
 
     return fig
 
@@ -512,11 +587,14 @@ def create_dual_axis_chart(df, save_path="capital_deepening_chart.png"):
 # =============================================================================
 
 
-def run_regression_analysis(df):
+@profiled
+def run_regression_analysis(df, plot_path="regression_plot.png", show=True):
     """
     Run a simple linear regression:
     - Y (Dependent): Real Exports (EXPGSC1)
     - X (Independent): Capital-Labor Ratio (K/L)
+
+    plot_path and show are passed on to create_regression_plot.
     """
     print("\n" + "=" * 70)
     print("REGRESSION ANALYSIS")
@@ -534,18 +612,36 @@ def run_regression_analysis(df):
     X_with_const = sm.add_constant(X)
 
     # Run OLS regression
-    model = sm.OLS(y, X_with_const).fit()
+    with measure("ols_fit", kind="function", rows=len(y)):
+        model = sm.OLS(y, X_with_const).fit()
 
     # Print results
-    print(model.summary())
+    with measure("ols_summary", kind="function"):
+        print(model.summary())
 
     # Create scatter plot with regression line
+    create_regression_plot(df, model, save_path=plot_path, show=show)
+
+    return model
+
+
+@profiled
+def create_regression_plot(df, model, save_path="regression_plot.png", show=True):
+    """
+    Scatter plot of Real Exports against K/L with the fitted regression line.
+
+    Pass save_path=None to keep the figure in memory only.
+    """
+    reg_data = df[["Real_Exports", "Capital_Labor_Ratio"]].dropna()
+    X = reg_data["Capital_Labor_Ratio"]
+    y = reg_data["Real_Exports"]
+
     fig, ax = plt.subplots(figsize=(10, 6))
 
     ax.scatter(X, y, alpha=0.6, label="Observed Data")
     ax.plot(
         X,
-        model.predict(X_with_const),
+        model.predict(sm.add_constant(X)),
         color="red",
         linewidth=2,
         label=f"Regression Line (R² = {model.rsquared:.4f})",
@@ -562,11 +658,13 @@ def run_regression_analysis(df):
     ax.grid(True, alpha=0.3)
 
     plt.tight_layout()
-    plt.savefig("regression_plot.png", dpi=300, bbox_inches="tight")
-    plt.show()
-    print("\n  ✓ Regression plot saved to: regression_plot.png")
+    if save_path is not None:
+        plt.savefig(save_path, dpi=300, bbox_inches="tight")
+        print(f"\n  ✓ Regression plot saved to: {save_path}")
+    if show:
+        plt.show()
 
-    return model
+    return fig
 
 
 # =============================================================================
@@ -574,6 +672,7 @@ def run_regression_analysis(df):
 # =============================================================================
 
 
+@profiled
 def test_stationarity(df):
     """
     Test for unit roots in the time series using Augmented Dickey-Fuller test.
@@ -590,7 +689,8 @@ def test_stationarity(df):
 
     for var in variables:
         series = df[var].dropna()
-        result = adfuller(series, autolag="AIC")
+        with measure(f"adfuller_{var}", kind="function", rows=len(series)):
+            result = adfuller(series, autolag="AIC")
 
         print(f"\n{var}:")
         print(f"  ADF Statistic: {result[0]:.4f}")
@@ -610,62 +710,262 @@ def test_stationarity(df):
 # =============================================================================
 
 
-def main():
+def main(
+    save_csv=True,
+    excel_output=None,
+    report_output=None,
+    profile=None,
+    compact=False,
+    breaks=False,
+    validation="warn",
+    validation_report=None,
+    quarantine=None,
+):
+    """
+    Run the full analysis.
+
+    save_csv=False skips writing heckscher_ohlin_data.csv. When excel_output
+    is a path, the computed frame and fitted regression are handed straight
+    to the xlsxwriter exporter in this process - no CSV round trip needed.
+    Likewise report_output writes the DOCX report with the figures embedded
+    from memory.
+
+    profile enables per-stage and per-function metrics: pass a path (.json or
+    .csv) to save them, or a profiling.Profiler to collect them yourself.
+
+    compact=True stores the downloaded frame in the compact layout of
+    memory_layout.compact_frame (float32 where exact, int16 years) and
+    prints the memory footprint before and after.
+
+    breaks=True detects structural breaks (structural_breaks.py), shades the
+    K/L regimes on the chart instead of the fixed KEY_PERIODS and fits the
+    regression separately within each regime of the exports-K/L relationship.
+
+    validation is the validation.enforce mode applied to the downloaded
+    frame: "warn" (the default) only reports, "abort" raises ValidationError
+    on any error and "quarantine" drops failing years into quarantine
+    (a CSV path; frame-level errors still abort), leaving gaps in the
+    series. validation_report saves the JSON report.
+    """
+    options = (
+        save_csv,
+        excel_output,
+        report_output,
+        compact,
+        breaks,
+        validation,
+        validation_report,
+        quarantine,
+    )
+    if not profile:
+        return run_analysis(*options)
+
+    profiler = profile if isinstance(profile, Profiler) else Profiler()
+    with profiler.activate():
+        result = run_analysis(*options)
+    profiler.print_summary()
+    if not isinstance(profile, Profiler):
+        profiler.save(profile)
+    return result
+
+
+def run_analysis(
+    save_csv=True,
+    excel_output=None,
+    report_output=None,
+    compact=False,
+    breaks=False,
+    validation="warn",
+    validation_report=None,
+    quarantine=None,
+):
+    """The analysis steps of main(), each measured as a profiling stage."""
     print("=" * 70)
     print("HECKSCHER-OHLIN MODEL: U.S. Factor Endowments Analysis")
     print("Assignment #4: Resource Allocation & Constrained Optimization")
     print("=" * 70)
 
     # Part 1: Download FRED data
-    df = download_fred_data(start_date="1960-01-01")
+    with measure("download") as record:
+        df = download_fred_data(start_date="1960-01-01")
+        record["rows"] = None if df is None else len(df)
 
     if df is None:
         print("Error: Could not download data. Please check your internet connection.")
         return
 
+    # Validate before any expensive stage
+    with measure("validate", rows=len(df)):
+        df = validate_frame(
+            df,
+            mode=validation,
+            report_path=validation_report,
+            quarantine_path=quarantine,
+        )
+
+    # Optional: compact column layout
+    if compact:
+        from memory_layout import compact_frame, memory_report, print_memory_report
+
+        with measure("compact", rows=len(df)):
+            compacted = compact_frame(df)
+            print_memory_report(memory_report(df, compacted))
+            df = compacted
+
     # Part 2: Calculate variables
-    df = calculate_variables(df)
+    with measure("calculate", rows=len(df)):
+        df = calculate_variables(df)
 
     # Display the data
-    print("\n" + "=" * 70)
-    print("CALCULATED DATA (First 10 and Last 10 years)")
-    print("=" * 70)
-    display_cols = [
-        "Real_GDP",
-        "Labor_Force",
-        "Real_Investment",
-        "Real_Exports",
-        "Capital_Deepening_Pct",
-        "Capital_Labor_Ratio",
-    ]
-    print("\nFirst 10 years:")
-    print(df[display_cols].head(10).round(2))
-    print("\nLast 10 years:")
-    print(df[display_cols].tail(10).round(2))
+    with measure("display", rows=len(df)):
+        display_data(df)
 
     # Save data to CSV
-    df.to_csv("heckscher_ohlin_data.csv")
-    print("\n  ✓ Data saved to: heckscher_ohlin_data.csv")
+    if save_csv:
+        with measure("save_csv", rows=len(df)):
+            df.to_csv("heckscher_ohlin_data.csv")
+        print("\n  ✓ Data saved to: heckscher_ohlin_data.csv")
+
+    # Optional: data-driven regimes for the chart and regression subsamples
+    segments = None
+    if breaks:
+        import structural_breaks
+
+        with measure("breaks", rows=len(df)):
+            segments = structural_breaks.detect_breaks(df)
 
     # Part 3: Create visualization
-    create_dual_axis_chart(df)
+    with measure("chart", rows=len(df)):
+        shade = None
+        if segments is not None:
+            shade = structural_breaks.shaded_periods(segments)
+        chart_fig = create_dual_axis_chart(df, shade=shade)
 
     # Part 4: Run regression
-    model = run_regression_analysis(df)
+    with measure("regression", rows=len(df)):
+        model = run_regression_analysis(df)
+
+    if segments is not None:
+        with measure("regime_regressions", rows=len(df)):
+            structural_breaks.print_breaks(
+                segments, structural_breaks.subsample_regressions(df, segments)
+            )
 
     # Additional: Test for stationarity
-    test_stationarity(df)
+    with measure("stationarity", rows=len(df)):
+        test_stationarity(df)
+
+    # Optional: Excel workbook straight from the in-memory results
+    if excel_output is not None:
+        from create_excel_charts_v2 import export_workbook
+
+        with measure("excel", rows=len(df)):
+            export_workbook(df, excel_output, model=model)
+
+    # Optional: Word report built from the same in-memory results
+    if report_output is not None:
+        from report_builder import build_report, figure_to_png
+
+        with measure("report", rows=len(df)):
+            regression_fig = create_regression_plot(
+                df, model, save_path=None, show=False
+            )
+            build_report(
+                df,
+                model,
+                {
+                    "Figure 1: Capital deepening and the capital-labor ratio": (
+                        figure_to_png(chart_fig)
+                    ),
+                    "Figure 2: Real exports vs. capital-labor ratio": (
+                        figure_to_png(regression_fig)
+                    ),
+                },
+                report_output,
+            )
+            plt.close(regression_fig)
 
     print("\n" + "=" * 70)
     print("ANALYSIS COMPLETE")
     print("=" * 70)
     print("\nOutput files generated:")
-    print("  1. heckscher_ohlin_data.csv - Complete dataset")
-    print("  2. capital_deepening_chart.png - Dual-axis visualization")
-    print("  3. regression_plot.png - Regression scatter plot")
+    if save_csv:
+        print("  - heckscher_ohlin_data.csv - Complete dataset")
+    print("  - capital_deepening_chart.png - Dual-axis visualization")
+    print("  - regression_plot.png - Regression scatter plot")
+    if excel_output is not None:
+        print(f"  - {excel_output} - Excel workbook with charts")
+    if report_output is not None:
+        print(f"  - {report_output} - Word report")
 
     return df, model
 
 
 if __name__ == "__main__":
-    df, model = main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Heckscher-Ohlin model analysis")
+    parser.add_argument(
+        "--no-csv",
+        action="store_true",
+        help="do not write heckscher_ohlin_data.csv",
+    )
+    parser.add_argument(
+        "--excel",
+        metavar="PATH",
+        help="also write the Excel workbook directly from the computed data",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="also write the DOCX report directly from the computed results",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="record per-stage/per-function metrics to PATH (.json or .csv)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="use the compact float32/int16 layout and report memory use",
+    )
+    parser.add_argument(
+        "--breaks",
+        action="store_true",
+        help="detect structural breaks for the chart shading and regime regressions",
+    )
+    parser.add_argument(
+        "--validation",
+        choices=VALIDATION_MODES,
+        default="warn",
+        help="what to do when the downloaded data fails validation",
+    )
+    parser.add_argument(
+        "--validation-report",
+        metavar="PATH",
+        help="save the JSON validation report to PATH",
+    )
+    parser.add_argument(
+        "--quarantine",
+        metavar="PATH",
+        help="where --validation quarantine writes the failing years "
+        "(default: quarantine.csv, only when years are dropped)",
+    )
+    args = parser.parse_args()
+
+    try:
+        df, model = main(
+            save_csv=not args.no_csv,
+            excel_output=args.excel,
+            report_output=args.report,
+            profile=args.profile,
+            compact=args.compact,
+            breaks=args.breaks,
+            validation=args.validation,
+            validation_report=args.validation_report,
+            quarantine=args.quarantine,
+        )
+    except ValidationError as e:
+        print(f"\n✗ {e}")
+        raise SystemExit(1)
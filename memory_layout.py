@@ -0,0 +1,154 @@
+"""
+Compact Column Layout for the Analysis Frame
+download_fred_data and create_sample_data build float64/int64 frames, and
+entity labels in panels arrive as strings. compact_frame() is an opt-in
+layout that stores the same data in fewer bytes:
+
+    float64 -> float32    only where every value survives the round trip
+                          (within rtol; exactly by default)
+    int64   -> int8/16/32 smallest type holding the range (Year -> int16)
+    strings -> category   integer codes plus one copy of each label
+
+The index is compacted the same way. memory_report() lists the bytes per
+column before and after, so a panel can be sized for a fixed-memory worker.
+
+Usage:
+    python memory_layout.py heckscher_ohlin_data.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# String columns with at most this share of distinct values become categorical
+CATEGORY_MAX_UNIQUE_SHARE = 0.5
+
+
+def _compact_floats(values, rtol):
+    """float32 copy of values if it round-trips within rtol, else None."""
+    array = values.to_numpy(dtype=np.float64)
+    with np.errstate(over="ignore"):
+        narrow = array.astype(np.float32)
+    if np.isclose(narrow, array, rtol=rtol, atol=0.0, equal_nan=True).all():
+        return narrow
+    return None
+
+
+def _compact_values(values, rtol):
+    """Compact representation of a Series or Index (unchanged if none fits)."""
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return values
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+        narrow = _compact_floats(values, rtol)
+        return values if narrow is None else narrow
+    if pd.api.types.is_integer_dtype(dtype) and len(values):
+        for candidate in (np.int8, np.int16, np.int32):
+            info = np.iinfo(candidate)
+            if info.min <= values.min() and values.max() <= info.max:
+                return values.astype(candidate)
+        return values
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if values.nunique() <= CATEGORY_MAX_UNIQUE_SHARE * len(values):
+            return values.astype("category")
+    return values
+
+
+def compact_frame(df, rtol=0.0):
+    """
+    Return a copy of df in the compact layout.
+
+    Float columns become float32 only when every value is within rtol of
+    its float64 value (rtol=0 requires an exact round trip, which holds for
+    the integer-valued sample data). Derived variables computed from a
+    compact frame are float32 as well.
+    """
+    columns = {}
+    for column in df.columns:
+        values = _compact_values(df[column], rtol)
+        # Bare arrays, so a duplicated panel index needs no alignment
+        columns[column] = values.array if isinstance(values, pd.Series) else values
+    compact = pd.DataFrame(columns)
+    if isinstance(df.index, pd.MultiIndex):
+        compact.index = df.index.set_levels(
+            [pd.Index(_compact_values(level, rtol)) for level in df.index.levels]
+        )
+    elif isinstance(df.index, pd.RangeIndex):
+        # Already stored as start/stop/step
+        compact.index = df.index
+    else:
+        compact.index = pd.Index(_compact_values(df.index, rtol), name=df.index.name)
+    return compact
+
+
+def _column_bytes(df):
+    usage = df.memory_usage(deep=True, index=True)
+    return usage.rename({"Index": df.index.name or "Index"})
+
+
+def memory_report(before, after):
+    """
+    Per-column dtypes and bytes of two layouts of the same frame.
+
+    Returns a DataFrame with Column, Dtype_Before, Bytes_Before, Dtype_After,
+    Bytes_After and Saving_Pct, plus a Total row.
+    """
+    index_name = before.index.name or "Index"
+    dtypes_before = {index_name: before.index.dtype, **before.dtypes.to_dict()}
+    dtypes_after = {index_name: after.index.dtype, **after.dtypes.to_dict()}
+    bytes_before = _column_bytes(before)
+    bytes_after = _column_bytes(after).reindex(bytes_before.index)
+
+    report = pd.DataFrame(
+        {
+            "Column": bytes_before.index,
+            "Dtype_Before": [str(dtypes_before[c]) for c in bytes_before.index],
+            "Bytes_Before": bytes_before.to_numpy(),
+            "Dtype_After": [str(dtypes_after[c]) for c in bytes_before.index],
+            "Bytes_After": bytes_after.to_numpy(),
+        }
+    )
+    total = pd.DataFrame(
+        {
+            "Column": ["Total"],
+            "Dtype_Before": [""],
+            "Bytes_Before": [report["Bytes_Before"].sum()],
+            "Dtype_After": [""],
+            "Bytes_After": [report["Bytes_After"].sum()],
+        }
+    )
+    report = pd.concat([report, total], ignore_index=True)
+    report["Saving_Pct"] = (
+        (1 - report["Bytes_After"] / report["Bytes_Before"]) * 100
+    ).round(1)
+    return report
+
+
+def print_memory_report(report):
+    print("\n" + "=" * 70)
+    print("MEMORY FOOTPRINT (bytes per column)")
+    print("=" * 70)
+    print(report.to_string(index=False))
+    total = report.iloc[-1]
+    print(
+        f"\n  ✓ {total['Bytes_Before'] / 1e6:.2f} MB -> "
+        f"{total['Bytes_After'] / 1e6:.2f} MB ({total['Saving_Pct']:.1f}% smaller)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("csv", nargs="?", default="heckscher_ohlin_data.csv")
+    parser.add_argument(
+        "--rtol",
+        type=float,
+        default=0.0,
+        help="relative error allowed when narrowing floats to float32",
+    )
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, index_col="Year")
+    print_memory_report(memory_report(df, compact_frame(df, args.rtol)))
@@ -0,0 +1,179 @@
+"""
+Panel Fixed-Effects Regression of Exports on the K/L Ratio
+The cross-country version of the Heckscher-Ohlin test: Real Exports on the
+Capital-Labor Ratio with entity and year fixed effects,
+
+    y_it = b x_it + a_i + g_t + e_it
+
+and standard errors clustered by entity. No dummy matrices are built. The
+fixed effects are swept out by alternating projections (Gaure, 2013):
+subtract the entity means, then the year means, and repeat until nothing
+changes (a balanced panel is done after the first sweep). Group means come from
+np.bincount over integer codes, so memory stays linear in rows for any
+number of entities.
+
+Clustered errors are CR1: the sandwich (X'X)^-1 (sum_g X_g'u_g u_g'X_g)
+(X'X)^-1 scaled by G/(G-1) x (N-1)/(N-K), where K counts the regressors and
+the year effects; the entity effects are nested in the clusters and not
+counted (as in Stata's reghdfe).
+
+Usage:
+    python panel_regression.py --csv panel.csv --entity Entity
+    python panel_regression.py --demo 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+REGRESSORS = ["Capital_Labor_Ratio"]
+RESPONSE = "Real_Exports"
+
+MAX_ITERATIONS = 1_000
+TOLERANCE = 1e-10
+
+
+def demean(values, groups, max_iterations=MAX_ITERATIONS, tol=TOLERANCE):
+    """
+    Sweep every set of group effects out of the columns of values.
+
+    values is (n, k); groups is a list of integer code arrays (0..G-1).
+    Returns (residuals, iterations).
+    """
+    resid = np.array(values, dtype=np.float64, copy=True)
+    counts = [np.bincount(codes) for codes in groups]
+    scale = np.maximum(np.abs(resid).max(axis=0), 1e-300)
+    for iteration in range(1, max_iterations + 1):
+        change = 0.0
+        for codes, count in zip(groups, counts):
+            for j in range(resid.shape[1]):
+                means = np.bincount(codes, weights=resid[:, j]) / count
+                step = means[codes]
+                resid[:, j] -= step
+                change = max(change, np.abs(step).max() / scale[j])
+        if change < tol or len(groups) == 1:
+            return resid, iteration
+    return resid, max_iterations
+
+
+class PanelOLS:
+    """
+    Two-way fixed-effects OLS with entity-clustered standard errors.
+
+    The fitted attributes mirror a statsmodels OLS result (params, bse,
+    tvalues, pvalues, rsquared, rsquared_adj, fvalue, nobs), so
+    excel_layout.regression_tables accepts it. rsquared is the within R².
+    """
+
+    def __init__(
+        self,
+        df,
+        entity_col="Entity",
+        time_col="Year",
+        regressors=REGRESSORS,
+        response=RESPONSE,
+    ):
+        if time_col not in df.columns:
+            df = df.reset_index()
+        self.regressors = list(regressors)
+        self.response = response
+        data = df[[entity_col, time_col] + self.regressors + [response]].dropna()
+        self.entity_codes, self.entities = pd.factorize(data[entity_col])
+        self.time_codes, self.periods = pd.factorize(data[time_col])
+        self._values = data[self.regressors + [response]].to_numpy(np.float64)
+
+    def fit(self, time_effects=True):
+        groups = [self.entity_codes]
+        if time_effects:
+            groups.append(self.time_codes)
+        resid, self.iterations = demean(self._values, groups)
+        X, y = resid[:, :-1], resid[:, -1]
+        n, k = X.shape
+
+        xtx_inv = np.linalg.inv(X.T @ X)
+        beta = xtx_inv @ (X.T @ y)
+        u = y - X @ beta
+
+        # Cluster scores: sum of X_i u_i within each entity
+        n_clusters = len(self.entities)
+        scores = np.column_stack(
+            [
+                np.bincount(
+                    self.entity_codes, weights=X[:, j] * u, minlength=n_clusters
+                )
+                for j in range(k)
+            ]
+        )
+        n_absorbed = len(self.periods) - 1 if time_effects else 0
+        self.df_model = k
+        self.df_resid = n - k - n_absorbed - len(self.entities)
+        correction = (n_clusters / (n_clusters - 1)) * ((n - 1) / (n - k - n_absorbed))
+        self.cov_params = correction * xtx_inv @ (scores.T @ scores) @ xtx_inv
+
+        self.nobs = float(n)
+        self.n_entities = n_clusters
+        self.n_periods = len(self.periods)
+        self.params = pd.Series(beta, index=self.regressors)
+        self.bse = pd.Series(np.sqrt(np.diag(self.cov_params)), index=self.regressors)
+        self.tvalues = self.params / self.bse
+        # Inference with G - 1 degrees of freedom, as usual for clustered errors
+        self.pvalues = pd.Series(
+            2 * stats.t.sf(np.abs(self.tvalues), n_clusters - 1), index=self.regressors
+        )
+        ssr = u @ u
+        self.rsquared = 1.0 - ssr / (y @ y)
+        self.rsquared_adj = 1.0 - (1.0 - self.rsquared) * (n - 1) / self.df_resid
+        # Cluster-robust Wald F for all slopes
+        self.fvalue = float(beta @ np.linalg.solve(self.cov_params, beta) / k)
+        return self
+
+
+def fit_panel(df, entity_col="Entity", time_col="Year", time_effects=True):
+    """Two-way FE regression of Real Exports on the K/L ratio."""
+    return PanelOLS(df, entity_col, time_col).fit(time_effects)
+
+
+if __name__ == "__main__":
+    from excel_layout import regression_tables
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--csv", help="panel with derived variables (Year, Entity)")
+    parser.add_argument("--entity", default="Entity")
+    parser.add_argument(
+        "--demo",
+        type=int,
+        metavar="N_ROWS",
+        help="use a synthetic panel with N_ROWS rows instead of --csv",
+    )
+    parser.add_argument(
+        "--no-time-effects", action="store_true", help="entity effects only"
+    )
+    args = parser.parse_args()
+
+    if args.demo:
+        from benchmarks import analysis_frame
+
+        df = analysis_frame(args.demo)
+    else:
+        df = pd.read_csv(args.csv)
+
+    start = time.perf_counter()
+    model = fit_panel(df, args.entity, time_effects=not args.no_time_effects)
+    seconds = time.perf_counter() - start
+
+    print("=" * 70)
+    print("PANEL REGRESSION: Real Exports on K/L, entity + year fixed effects")
+    print("=" * 70)
+    print(
+        f"{int(model.nobs):,} observations, {model.n_entities:,} entities, "
+        f"{model.n_periods} years; standard errors clustered by entity"
+    )
+    coefficients, fit = regression_tables(model)
+    print(coefficients.round(6).to_string(index=False))
+    print(fit.round(4).to_string(index=False))
+    print(f"\n✓ Fitted in {seconds:.2f}s ({model.iterations} demeaning passes)")
@@ -0,0 +1,510 @@
+"""
+Heckscher-Ohlin Analysis as a Stage Graph
+Declares the steps of heckscher_ohlin_analysis.main() as stages with explicit
+inputs and outputs and runs them with a small dependency-driven scheduler:
+
+    download -> validate -> calculate -> display
+                                        -> save_csv
+                                        -> chart
+                                        -> regression -> excel (optional)
+                                        -> stationarity
+                                        -> forecast (optional)
+
+Stages whose inputs are available run concurrently in worker processes, so
+the chart, regression and stationarity tests no longer wait on each other.
+Every stage is fingerprinted from its code, parameters and the content
+hashes of its inputs; when the fingerprint matches the previous run (and any
+files it writes still exist) its cached outputs are reused instead.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import matplotlib
+
+matplotlib.use("Agg")  # stages only save figures, never show them
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from profiling import Profiler
+from heckscher_ohlin_analysis import (
+    calculate_variables,
+    create_dual_axis_chart,
+    display_data,
+    download_fred_data,
+    run_regression_analysis,
+    test_stationarity,
+)
+from validation import DEFAULT_QUARANTINE, MODES as VALIDATION_MODES, validate_frame
+
+DEFAULT_CACHE_DIR = ".pipeline_cache"
+STATE_FILE = "state.json"
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    func receives the values of inputs positionally plus params as keyword
+    arguments and returns the value of its single output, a tuple for
+    several outputs, or nothing. files lists paths the stage writes; a
+    cached result is only reused while they exist. code lists what func
+    calls outside its own module - callables, modules or module names (for
+    lazily imported ones) - so editing them invalidates the stage as well.
+    always_run stages (e.g.
+    reads from an external source) execute every time, but their downstream
+    stages are still skipped when the data they produce is unchanged.
+    """
+
+    def __init__(
+        self,
+        name,
+        func,
+        inputs=(),
+        outputs=(),
+        files=(),
+        params=None,
+        always_run=False,
+        code=(),
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.files = tuple(files)
+        self.params = params or {}
+        self.always_run = always_run
+        self.code = tuple(code)
+
+    def modules(self):
+        """The modules whose source makes up the stage, sorted by file name."""
+        modules = [inspect.getmodule(self.func), inspect.getmodule(Stage)]
+        for dependency in self.code:
+            if isinstance(dependency, str):
+                modules.append(importlib.import_module(dependency))
+            elif inspect.ismodule(dependency):
+                modules.append(dependency)
+            else:
+                modules.append(inspect.getmodule(dependency))
+        # Keyed by file: pipeline.py run as a script is __main__
+        unique = {
+            os.path.basename(inspect.getfile(module)): module for module in modules
+        }
+        return [unique[name] for name in sorted(unique)]
+
+    def code_hash(self):
+        """Hash of the source of the modules that implement the stage."""
+        digest = hashlib.sha256()
+        for module in self.modules():
+            digest.update(inspect.getsource(module).encode("utf-8"))
+        return digest.hexdigest()
+
+
+# =============================================================================
+# Stage functions (module-level so worker processes can unpickle them)
+# =============================================================================
+
+
+def _download(start_date):
+    raw = download_fred_data(start_date=start_date)
+    if raw is None:
+        raise RuntimeError("Could not download data")
+    return raw
+
+
+def _save_csv(df, path):
+    df.to_csv(path)
+    print(f"\n  ✓ Data saved to: {path}")
+
+
+def _chart(df, path):
+    plt.close(create_dual_axis_chart(df, save_path=path, show=False))
+
+
+def _regression(df, path):
+    model = run_regression_analysis(df, plot_path=path, show=False)
+    plt.close("all")
+    return model
+
+
+def _excel(df, model, path):
+    from create_excel_charts_v2 import export_workbook
+
+    export_workbook(df, path, model=model)
+
+
+def _forecast(df, path, horizon):
+    from forecasting import forecast
+
+    # Stages already run in the pipeline's worker pool; fitting in a nested
+    # pool of cpu_count processes would oversubscribe the CPUs
+    table = forecast(df, horizon=horizon, max_workers=1)
+    table.to_csv(path, index=False)
+    print(f"\n  ✓ Forecasts saved to: {path}")
+    return table
+
+
+def analysis_stages(
+    start_date="1960-01-01",
+    csv_path="heckscher_ohlin_data.csv",
+    chart_path="capital_deepening_chart.png",
+    regression_plot_path="regression_plot.png",
+    excel_output=None,
+    forecast_output=None,
+    forecast_horizon=10,
+    validation="warn",
+    validation_report=None,
+    quarantine=DEFAULT_QUARANTINE,
+):
+    """
+    The stage graph of heckscher_ohlin_analysis.main().
+
+    The validate stage applies validation.enforce with the given mode; with
+    "abort" a failing download stops the run before any downstream stage.
+    With "quarantine" the quarantine CSV is one of the stage's files, so it
+    is always written (header only when no year is dropped).
+    """
+    validation_files = [validation_report] if validation_report else []
+    if validation == "quarantine":
+        validation_files.append(quarantine)
+    stages = [
+        Stage(
+            "download",
+            _download,
+            outputs=["raw"],
+            params={"start_date": start_date},
+            always_run=True,
+            code=[download_fred_data],
+        ),
+        Stage(
+            "validate",
+            validate_frame,
+            inputs=["raw"],
+            outputs=["checked"],
+            files=validation_files,
+            params={
+                "mode": validation,
+                "report_path": validation_report,
+                "quarantine_path": quarantine,
+            },
+        ),
+        Stage("calculate", calculate_variables, inputs=["checked"], outputs=["df"]),
+        Stage("display", display_data, inputs=["df"]),
+        Stage(
+            "save_csv",
+            _save_csv,
+            inputs=["df"],
+            files=[csv_path],
+            params={"path": csv_path},
+        ),
+        Stage(
+            "chart",
+            _chart,
+            inputs=["df"],
+            files=[chart_path],
+            params={"path": chart_path},
+            code=[create_dual_axis_chart],
+        ),
+        Stage(
+            "regression",
+            _regression,
+            inputs=["df"],
+            outputs=["model"],
+            files=[regression_plot_path],
+            params={"path": regression_plot_path},
+            code=[run_regression_analysis],
+        ),
+        Stage("stationarity", test_stationarity, inputs=["df"]),
+    ]
+    if excel_output is not None:
+        stages.append(
+            Stage(
+                "excel",
+                _excel,
+                inputs=["df", "model"],
+                files=[excel_output],
+                params={"path": excel_output},
+                code=["create_excel_charts_v2", "excel_layout", "summary_statistics"],
+            )
+        )
+    if forecast_output is not None:
+        stages.append(
+            Stage(
+                "forecast",
+                _forecast,
+                inputs=["df"],
+                outputs=["forecasts"],
+                files=[forecast_output],
+                params={"path": forecast_output, "horizon": forecast_horizon},
+                code=["forecasting"],
+            )
+        )
+    return stages
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+
+def _digest(value):
+    """Content hash of a stage output."""
+    digest = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        digest.update(repr(list(frame.columns)).encode("utf-8"))
+        digest.update(repr(list(frame.dtypes)).encode("utf-8"))
+    else:
+        digest.update(pickle.dumps(value))
+    return digest.hexdigest()
+
+
+def _fingerprint(stage, hashes):
+    payload = {
+        "stage": stage.name,
+        "code": stage.code_hash(),
+        "params": repr(sorted(stage.params.items())),
+        "inputs": {name: hashes[name] for name in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _execute(name, func, args, params, n_outputs, profile=False):
+    """
+    Worker: run a stage, capturing its console output.
+
+    With profile=True the stage and the @profiled functions it calls are
+    measured in the worker and their metrics records returned.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    profiler = Profiler() if profile else None
+    with contextlib.redirect_stdout(log):
+        if profiler is None:
+            result = func(*args, **params)
+        else:
+            with profiler.activate(), profiler.measure(name) as record:
+                result = func(*args, **params)
+                record["rows"] = (
+                    len(args[0]) if args and hasattr(args[0], "shape") else None
+                )
+    if n_outputs == 0:
+        outputs = ()
+    elif n_outputs == 1:
+        outputs = (result,)
+    else:
+        outputs = tuple(result)
+    records = profiler.records if profiler is not None else []
+    return outputs, log.getvalue(), time.perf_counter() - start, records
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _validate(stages):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(
+                    f"Output '{output}' is produced by both "
+                    f"'{producers[output]}' and '{stage.name}'"
+                )
+            producers[output] = stage.name
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in producers]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' needs unknown inputs {missing}")
+
+
+def run_pipeline(
+    stages, cache_dir=DEFAULT_CACHE_DIR, max_workers=None, force=False, profiler=None
+):
+    """
+    Run stages in dependency order, in parallel where possible.
+
+    Outputs and fingerprints are kept in cache_dir so the next run can skip
+    stages whose inputs did not change; force=True reruns everything. Pass a
+    profiling.Profiler to collect the metrics of every stage that runs.
+    Returns a dict with every output value.
+    """
+    _validate(stages)
+    os.makedirs(cache_dir, exist_ok=True)
+    state_path = os.path.join(cache_dir, STATE_FILE)
+    state = {}
+    if os.path.exists(state_path) and not force:
+        with open(state_path) as f:
+            state = json.load(f)
+
+    values, hashes, report = {}, {}, []
+    pending = list(stages)
+    running = {}
+
+    def finish(stage, fingerprint, outputs, log, seconds, status):
+        print(log, end="")
+        for name, value in zip(stage.outputs, outputs):
+            values[name] = value
+            if status == "ran":
+                hashes[name] = _digest(value)
+            else:
+                hashes[name] = state[stage.name]["outputs"][name]
+        if status == "ran":
+            pickle_path = os.path.join(cache_dir, f"{stage.name}.pkl")
+            _write_atomic(pickle_path, pickle.dumps(outputs))
+            state[stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": {name: hashes[name] for name in stage.outputs},
+                "log": log,
+            }
+            _write_atomic(state_path, json.dumps(state, indent=2).encode("utf-8"))
+        report.append((stage.name, status, seconds))
+
+    def load_cached(stage, fingerprint):
+        entry = state.get(stage.name)
+        pickle_path = os.path.join(cache_dir, f"{stage.name}.pkl")
+        if (
+            stage.always_run
+            or entry is None
+            or entry["fingerprint"] != fingerprint
+            or not all(os.path.exists(path) for path in stage.files)
+            or not os.path.exists(pickle_path)
+        ):
+            return None
+        with open(pickle_path, "rb") as f:
+            return pickle.load(f), entry["log"]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # Launch (or satisfy from cache) every stage whose inputs are ready
+            progress = True
+            while progress:
+                progress = False
+                for stage in list(pending):
+                    if not all(name in values for name in stage.inputs):
+                        continue
+                    pending.remove(stage)
+                    progress = True
+                    fingerprint = _fingerprint(stage, hashes)
+                    cached = load_cached(stage, fingerprint)
+                    if cached is not None:
+                        outputs, log = cached
+                        finish(stage, fingerprint, outputs, log, 0.0, "cached")
+                        continue
+                    future = pool.submit(
+                        _execute,
+                        stage.name,
+                        stage.func,
+                        [values[name] for name in stage.inputs],
+                        stage.params,
+                        len(stage.outputs),
+                        profiler is not None,
+                    )
+                    launched = profiler.elapsed() if profiler is not None else 0.0
+                    running[future] = (stage, fingerprint, launched)
+
+            if not running:
+                if pending:
+                    names = ", ".join(stage.name for stage in pending)
+                    raise ValueError(f"Stages can never run (cycle?): {names}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, fingerprint, launched = running.pop(future)
+                try:
+                    outputs, log, seconds, records = future.result()
+                except Exception as e:
+                    print(f"  ✗ Stage '{stage.name}' failed: {e}")
+                    raise
+                finish(stage, fingerprint, outputs, log, seconds, "ran")
+                for record in records:
+                    # Worker clocks start at the stage; rebase onto this run
+                    record["start_s"] += launched
+                    profiler.add_record(record)
+
+    print("\n" + "=" * 70)
+    print("PIPELINE SUMMARY")
+    print("=" * 70)
+    print(f"{'Stage':<16}{'Status':<10}{'Seconds':>8}")
+    for name, status, seconds in report:
+        print(f"{name:<16}{status:<10}{seconds:>8.2f}")
+    ran = sum(status == "ran" for _, status, _ in report)
+    print(f"\n✓ {ran} stages ran, {len(report) - ran} cached")
+
+    return values
+
+
+def print_fingerprints(stages):
+    """Code hash of every stage and the modules it is computed from."""
+    print(f"{'stage':<14}  {'code hash':<12}  modules")
+    for stage in stages:
+        modules = ", ".join(
+            os.path.basename(inspect.getfile(module)) for module in stage.modules()
+        )
+        print(f"{stage.name:<14}  {stage.code_hash()[:12]}  {modules}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--excel", metavar="PATH", help="also export the workbook")
+    parser.add_argument(
+        "--forecast", metavar="PATH", help="also write ARIMA/ETS forecasts to PATH"
+    )
+    parser.add_argument("--validation", choices=VALIDATION_MODES, default="warn")
+    parser.add_argument("--validation-report", metavar="PATH")
+    parser.add_argument("--quarantine", metavar="PATH", default=DEFAULT_QUARANTINE)
+    parser.add_argument("--force", action="store_true", help="rerun every stage")
+    parser.add_argument(
+        "--fingerprints",
+        action="store_true",
+        help="print each stage's code hash and the modules it covers, then exit",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="record per-stage/per-function metrics to PATH (.json or .csv)",
+    )
+    args = parser.parse_args()
+
+    stages = analysis_stages(
+        excel_output=args.excel,
+        forecast_output=args.forecast,
+        validation=args.validation,
+        validation_report=args.validation_report,
+        quarantine=args.quarantine,
+    )
+    if args.fingerprints:
+        print_fingerprints(stages)
+        raise SystemExit(0)
+
+    profiler = Profiler() if args.profile else None
+    run_pipeline(
+        stages,
+        cache_dir=args.cache_dir,
+        max_workers=args.workers,
+        force=args.force,
+        profiler=profiler,
+    )
+    if profiler is not None:
+        profiler.print_summary()
+        profiler.save(args.profile)
@@ -0,0 +1,229 @@
+"""
+Per-Stage and Per-Function Profiling for the Analysis
+Records wall time, CPU time, peak Python allocations (tracemalloc), peak RSS
+and row counts for blocks of work and exports them as JSON or CSV metrics so
+runs can be compared over time.
+
+Usage:
+    profiler = Profiler()
+    with profiler.activate():
+        with profiler.measure("load") as record:
+            df = pd.read_csv(path)
+            record["rows"] = len(df)
+        run_regression_analysis(df)   # @profiled functions are recorded too
+    profiler.save("metrics.json")
+
+Functions decorated with @profiled cost a single check when no profiler is
+active.
+"""
+
+import contextlib
+import csv
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+METRIC_COLUMNS = [
+    "name",
+    "kind",
+    "parent",
+    "depth",
+    "start_s",
+    "wall_s",
+    "cpu_s",
+    "py_peak_mb",
+    "max_rss_mb",
+    "rows",
+]
+
+_active = None
+
+
+def get_profiler():
+    """The profiler currently collecting metrics, or None."""
+    return _active
+
+
+def measure(name, kind="stage", rows=None):
+    """Profiler.measure on the active profiler; a no-op block when none is."""
+    if _active is None:
+        return contextlib.nullcontext({})
+    return _active.measure(name, kind=kind, rows=rows)
+
+
+def _max_rss_mb():
+    """Peak resident set size of this process so far, if the OS reports it."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def _row_count(value):
+    """Row count of a DataFrame/array-like result, else None."""
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class Profiler:
+    """
+    Collects one metrics record per measured block.
+
+    trace_memory=True tracks peak Python allocations with tracemalloc, which
+    slows allocation-heavy code down; the other metrics are cheap. on_record
+    is called with every finished record, e.g. to forward it to monitoring.
+    """
+
+    def __init__(self, trace_memory=True, on_record=None):
+        self.trace_memory = trace_memory
+        self.on_record = on_record
+        self.records = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._started_tracing = False
+
+    def elapsed(self):
+        """Seconds since the profiler was created (the start_s time base)."""
+        return time.perf_counter() - self._origin
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this the profiler that @profiled functions report to."""
+        global _active
+        previous = _active
+        _active = self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        try:
+            yield self
+        finally:
+            _active = previous
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    @contextlib.contextmanager
+    def measure(self, name, kind="stage", rows=None):
+        """
+        Measure the enclosed block.
+
+        Yields the record being built; set record["rows"] inside the block to
+        attach a row count. Blocks may nest: records carry their parent and
+        depth, and an inner block's allocation peak counts towards its
+        parents.
+        """
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        record = {
+            "name": name,
+            "kind": kind,
+            "parent": self._stack[-1]["name"] if self._stack else None,
+            "depth": len(self._stack),
+            "start_s": self.elapsed(),
+            "rows": rows,
+        }
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            record["_base"], record["_peak"] = base, base
+        self._stack.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.process_time() - cpu
+            self._stack.pop()
+            py_peak = None
+            if tracing:
+                peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                py_peak = (peak - record.pop("_base")) / 2**20
+                for outer in self._stack:
+                    if "_peak" in outer:
+                        outer["_peak"] = max(outer["_peak"], peak)
+            record["py_peak_mb"] = py_peak
+            record["max_rss_mb"] = _max_rss_mb()
+            self.add_record(record)
+
+    def add_record(self, record):
+        """Store a finished record (also used for records from worker processes)."""
+        record = {column: record.get(column) for column in METRIC_COLUMNS}
+        self.records.append(record)
+        if self.on_record is not None:
+            self.on_record(record)
+
+    def to_dict(self):
+        return {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "records": self.records,
+        }
+
+    def save(self, path):
+        """Write the metrics as CSV when path ends in .csv, otherwise JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=METRIC_COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+        print(f"  ✓ Profile saved to: {path}")
+
+    def print_summary(self):
+        print("\n" + "=" * 70)
+        print("PROFILE")
+        print("=" * 70)
+        print(f"{'Block':<34}{'Wall s':>9}{'CPU s':>9}{'Py MB':>9}{'Rows':>8}")
+        for record in sorted(self.records, key=lambda record: record["start_s"]):
+            name = "  " * record["depth"] + record["name"]
+            py_peak = record["py_peak_mb"]
+            print(
+                f"{name[:34]:<34}{record['wall_s']:>9.3f}{record['cpu_s']:>9.3f}"
+                f"{'' if py_peak is None else f'{py_peak:.1f}':>9}"
+                f"{'' if record['rows'] is None else record['rows']:>8}"
+            )
+
+
+def profiled(func=None, name=None):
+    """
+    Record calls to func on the active profiler.
+
+    The row count is taken from the result when it has a shape (DataFrame,
+    array), otherwise from the first argument that has one.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name)
+
+    label = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.measure(label, kind="function") as record:
+            result = func(*args, **kwargs)
+            record["rows"] = _row_count(result)
+            if record["rows"] is None and args:
+                record["rows"] = _row_count(args[0])
+        return result
+
+    return wrapper
@@ -0,0 +1,223 @@
+"""
+Monte Carlo Projections of Capital Deepening and the K/L Ratio
+Projects Capital_Deepening_Pct and Capital_Labor_Ratio forward under
+stochastic growth of Real GDP, Real Investment and the Labor Force. Annual
+log growth rates are drawn from a multivariate normal calibrated on the
+historical series (mean and covariance, so the co-movement of investment
+and GDP is kept).
+
+Paths are simulated in chunks as single NumPy array operations, spread over
+worker processes with independent random streams (SeedSequence.spawn, one
+per chunk, so results do not depend on the number of workers). Paths are
+never kept: each chunk is folded into fixed-bin histograms per variable and
+horizon, which merge by addition, and the fan quantiles are read off the
+merged histograms.
+
+Usage:
+    python projections.py --paths 200000 --horizon 20 --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+GROWTH_SERIES = ["Real_GDP", "Real_Investment", "Labor_Force"]
+PROJECTED = ["Capital_Deepening_Pct", "Capital_Labor_Ratio"]
+QUANTILES = [0.05, 0.25, 0.50, 0.75, 0.95]
+QUANTILE_COLUMNS = ["P5", "P25", "P50", "P75", "P95"]
+
+CHUNK_PATHS = 25_000
+N_BINS = 4_000
+# Histogram range around the expected log level, in standard deviations
+BIN_SPAN_SD = 8.0
+
+
+def calibrate(df):
+    """
+    Mean and covariance of annual log growth of GROWTH_SERIES.
+
+    Returns (last_levels, mean, covariance, last_year).
+    """
+    if "Year" in df.columns:
+        df = df.set_index("Year")
+    levels = df[GROWTH_SERIES].dropna()
+    growth = np.diff(np.log(levels.to_numpy(dtype=np.float64)), axis=0)
+    return (
+        levels.iloc[-1].to_numpy(dtype=np.float64),
+        growth.mean(axis=0),
+        np.cov(growth, rowvar=False),
+        int(levels.index[-1]),
+    )
+
+
+def _log_projected(log_levels):
+    """Log of the projected variables from log levels (..., 3)."""
+    log_gdp, log_investment, log_labor = np.moveaxis(log_levels, -1, 0)
+    return (
+        # Capital deepening = Investment / GDP × 100
+        log_investment - log_gdp + np.log(100.0),
+        # K/L = Investment × 1e9 / (Labor Force × 1e3)
+        log_investment - log_labor + np.log(1e6),
+    )
+
+
+class FanAccumulator:
+    """
+    Mergeable histograms of projected log values per variable and year.
+
+    Bins are fixed up front (centred on the expected log level of each
+    horizon, BIN_SPAN_SD standard deviations wide) so accumulators from
+    different processes combine by adding counts. The outermost bins
+    collect values beyond the range.
+    """
+
+    def __init__(self, centers, spreads, n_bins=N_BINS):
+        self.lows = centers - BIN_SPAN_SD * spreads
+        self.widths = 2 * BIN_SPAN_SD * spreads / n_bins
+        self.n_bins = n_bins
+        # (variable, horizon, bin) plus under/overflow bins at both ends
+        self.counts = np.zeros(centers.shape + (n_bins + 2,), dtype=np.int64)
+        self.sums = np.zeros(centers.shape)
+        self.paths = 0
+
+    def add(self, log_values):
+        """Fold in log values shaped (variable, paths, horizon)."""
+        n_vars, n_paths, horizon = log_values.shape
+        bins = np.floor(
+            (log_values - self.lows[:, None, :]) / self.widths[:, None, :]
+        ).astype(np.int64)
+        bins = np.clip(bins + 1, 0, self.n_bins + 1)
+        # One bincount over (variable, horizon, bin) cell ids
+        cells = (np.arange(n_vars)[:, None, None] * horizon + np.arange(horizon)) * (
+            self.n_bins + 2
+        ) + bins
+        self.counts += np.bincount(cells.ravel(), minlength=self.counts.size).reshape(
+            self.counts.shape
+        )
+        self.sums += np.exp(log_values).sum(axis=1)
+        self.paths += n_paths
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.sums += other.sums
+        self.paths += other.paths
+        return self
+
+    def quantiles(self, qs=QUANTILES):
+        """Quantiles (variable, horizon, q), interpolated within bins."""
+        cdf = np.cumsum(self.counts, axis=-1) / self.paths
+        result = np.empty(self.counts.shape[:2] + (len(qs),))
+        for v in range(cdf.shape[0]):
+            for h in range(cdf.shape[1]):
+                row = cdf[v, h]
+                for j, q in enumerate(qs):
+                    b = int(np.searchsorted(row, q))
+                    below = row[b - 1] if b > 0 else 0.0
+                    share = (q - below) / max(row[b] - below, 1e-300)
+                    # Bin b covers [low + (b-1) w, low + b w); clamp the
+                    # overflow bins to the edge of the range
+                    position = min(max(b - 1 + share, 0.0), self.n_bins)
+                    result[v, h, j] = self.lows[v, h] + position * self.widths[v, h]
+        return np.exp(result)
+
+    def means(self):
+        return self.sums / self.paths
+
+
+def _simulate_chunks(seeds, sizes, start_log, mean, chol, accumulator):
+    """Worker: simulate chunks of paths and return their histograms."""
+    horizon = accumulator.counts.shape[1]
+    for seed, n_paths in zip(seeds, sizes):
+        rng = np.random.default_rng(seed)
+        shocks = rng.standard_normal((n_paths, horizon, len(mean)))
+        log_levels = start_log + np.cumsum(mean + shocks @ chol.T, axis=1)
+        accumulator.add(np.stack(_log_projected(log_levels)))
+    return accumulator
+
+
+def project(df, n_paths=100_000, horizon=20, seed=0, max_workers=None):
+    """
+    Simulate n_paths growth paths horizon years ahead.
+
+    Returns the fan as a long DataFrame with one row per projected year and
+    variable: Year, Variable, Mean and the P5/P25/P50/P75/P95 quantiles.
+    """
+    last_levels, mean, covariance, last_year = calibrate(df)
+    chol = np.linalg.cholesky(covariance)
+    start_log = np.log(last_levels)
+
+    # Bin layout from the analytic distribution of the log projections
+    steps = np.arange(1, horizon + 1)
+    contrasts = np.array([[-1.0, 1.0, 0.0], [0.0, 1.0, -1.0]])
+    centers = np.stack(_log_projected(start_log + steps[:, None] * mean))
+    spreads = np.sqrt(
+        np.einsum("vi,ij,vj->v", contrasts, covariance, contrasts)[:, None] * steps
+    )
+
+    # Fixed-size chunks, each with its own child stream
+    sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS)
+    if n_paths % CHUNK_PATHS:
+        sizes.append(n_paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    n_workers = min(max_workers or os.cpu_count() or 1, len(sizes))
+
+    fan = FanAccumulator(centers, spreads)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(
+                _simulate_chunks,
+                seeds[w::n_workers],
+                sizes[w::n_workers],
+                start_log,
+                mean,
+                chol,
+                FanAccumulator(centers, spreads),
+            )
+            for w in range(n_workers)
+        ]
+        for future in futures:
+            fan.merge(future.result())
+
+    quantiles = fan.quantiles()
+    means = fan.means()
+    frames = []
+    for v, variable in enumerate(PROJECTED):
+        frame = pd.DataFrame(quantiles[v], columns=QUANTILE_COLUMNS)
+        frame.insert(0, "Mean", means[v])
+        frame.insert(0, "Variable", variable)
+        frame.insert(0, "Year", last_year + steps)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default="heckscher_ohlin_data.csv")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="projections.csv")
+    parser.add_argument("--chart", default="capital_deepening_projection.png")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, index_col="Year")
+
+    start = time.perf_counter()
+    fan = project(df, args.paths, args.horizon, args.seed, args.workers)
+    print(
+        f"✓ Simulated {args.paths:,} paths x {args.horizon} years "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    print(fan[fan["Year"] == fan["Year"].max()].round(2).to_string(index=False))
+    fan.to_csv(args.output, index=False)
+    print(f"✓ Fan saved to: {args.output}")
+
+    if args.chart:
+        from heckscher_ohlin_analysis import create_dual_axis_chart
+
+        create_dual_axis_chart(df, save_path=args.chart, show=False, fan=fan)
@@ -0,0 +1,117 @@
+"""
+Build the Heckscher-Ohlin Word Report Directly from Memory
+Takes the computed DataFrame, the fitted regression and rendered matplotlib
+figures and writes a DOCX with embedded charts, summary statistics, the
+regression results and the full data table - without going through PNG
+files, the CSV or a markdown re-parse.
+"""
+
+import io
+
+from docx import Document
+from docx.shared import Inches
+
+from convert_to_docx import add_table_rows
+from excel_layout import DATA_HEADERS, export_frame, regression_tables
+from summary_statistics import COUNT_COLUMNS, summarize
+
+
+def figure_to_png(fig, dpi=150):
+    """Render a matplotlib figure into an in-memory PNG buffer."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    buffer.seek(0)
+    return buffer
+
+
+def _format_column(values, fmt):
+    """Format a column for a Word table; missing values become blank cells."""
+    return ["" if value != value else format(value, fmt) for value in values.tolist()]
+
+
+def _table_rows(table, formats):
+    """Header row plus formatted body rows of a DataFrame, built column-wise."""
+    columns = [
+        (
+            table[column].tolist()
+            if formats.get(column) is None
+            else _format_column(table[column].to_numpy(), formats[column])
+        )
+        for column in table.columns
+    ]
+    return [list(map(str, table.columns))] + [list(row) for row in zip(*columns)]
+
+
+def build_report(
+    df,
+    model,
+    figures,
+    output_file="heckscher_ohlin_report.docx",
+    title="Heckscher-Ohlin Model Analysis",
+):
+    """
+    Write a DOCX report from in-memory results.
+
+    df is the analysis frame (Year as index or column), model the fitted
+    statsmodels OLS result and figures a mapping of caption -> PNG buffer
+    (see figure_to_png). Tables are emitted with the bulk table builder.
+    """
+    df = export_frame(df)
+    doc = Document()
+    doc.add_heading(title, level=1)
+    doc.add_paragraph(
+        f"U.S. factor endowments and trade performance, "
+        f"{int(df['Year'].min())}-{int(df['Year'].max())}."
+    )
+
+    # Charts
+    if figures:
+        doc.add_heading("Charts", level=2)
+        for caption, png in figures.items():
+            doc.add_picture(png, width=Inches(6.5))
+            doc.add_paragraph(caption, style="Caption")
+
+    # Summary statistics
+    doc.add_heading("Summary Statistics", level=2)
+    summary = summarize(df)
+    add_table_rows(
+        doc,
+        _table_rows(
+            summary,
+            {
+                column: ",.0f" if column in COUNT_COLUMNS else ",.2f"
+                for column in summary.columns[1:]
+            },
+        ),
+    )
+
+    # Regression
+    doc.add_heading("Regression: Real Exports on Capital-Labor Ratio", level=2)
+    coefficients, fit = regression_tables(model)
+    add_table_rows(
+        doc,
+        _table_rows(
+            coefficients,
+            {
+                "Coefficient": ",.4f",
+                "Std Error": ",.4f",
+                "t Statistic": ".3f",
+                "P-Value": ".4g",
+            },
+        ),
+    )
+    doc.add_paragraph()
+    add_table_rows(doc, _table_rows(fit, {"Value": ",.4f"}))
+
+    # Data
+    doc.add_heading("Data", level=2)
+    data_formats = {header: ",.2f" for header in DATA_HEADERS[1:]}
+    data_formats["Year"] = "d"
+    add_table_rows(
+        doc,
+        _table_rows(df[DATA_HEADERS].astype({"Year": int}), data_formats),
+    )
+
+    doc.save(output_file)
+    print(f"\n  ✓ Report saved to: {output_file}")
+    return output_file
@@ -0,0 +1,182 @@
+"""
+Summary Statistics for the Heckscher-Ohlin Dataset
+Computes the Summary sheet statistics for any number of variables (and
+optionally entities) in one vectorized pass over the data.
+
+For data that does not fit in memory, RunningStats accumulates the same
+moments chunk by chunk (Welford/Chan updates) and can be merged across
+workers. Quantiles need the full sample, so they are only available from
+summarize().
+"""
+
+import numpy as np
+import pandas as pd
+
+# (label, column) pairs shown on the Summary sheet by default
+SUMMARY_VARIABLES = [
+    ("Capital Deepening (%)", "Capital_Deepening_Pct"),
+    ("Capital-Labor Ratio ($)", "Capital_Labor_Ratio"),
+    ("Real Exports (Billions $)", "Real_Exports"),
+    ("Real GDP (Billions $)", "Real_GDP"),
+]
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+STAT_COLUMNS = [
+    "Count",
+    "Missing",
+    "Mean",
+    "Std Dev",
+    "Min",
+    "25%",
+    "Median",
+    "75%",
+    "Max",
+]
+
+# Statistics that are counts rather than measurements
+COUNT_COLUMNS = ["Count", "Missing"]
+
+
+def _normalize_variables(variables):
+    """Accept (label, column) pairs or bare column names."""
+    if variables is None:
+        variables = SUMMARY_VARIABLES
+    return [(v, v) if isinstance(v, str) else tuple(v) for v in variables]
+
+
+def _block_statistics(values):
+    """
+    Statistics for every column of a 2-D float array in one set of array ops.
+
+    Returns an array of shape (n_columns, len(STAT_COLUMNS)).
+    """
+    n_cols = values.shape[1]
+    stats = np.full((n_cols, len(STAT_COLUMNS)), np.nan)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    stats[:, 0] = count
+    stats[:, 1] = values.shape[0] - count
+
+    has_data = count > 0
+    if not has_data.any():
+        return stats
+
+    block = values[:, has_data]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats[has_data, 2] = np.nanmean(block, axis=0)
+        stats[has_data, 3] = np.nanstd(block, axis=0, ddof=1)
+    stats[has_data, 4] = np.nanmin(block, axis=0)
+    stats[has_data, 5:8] = np.nanquantile(block, QUANTILES, axis=0).T
+    stats[has_data, 8] = np.nanmax(block, axis=0)
+    return stats
+
+
+def summarize(df, variables=None, entity_col=None):
+    """
+    Summary statistics for each variable (and entity, if entity_col is given).
+
+    variables is a list of (label, column) pairs or column names and defaults
+    to SUMMARY_VARIABLES. Returns a DataFrame with a Variable column (preceded
+    by the entity column when grouping) followed by STAT_COLUMNS.
+    """
+    variables = _normalize_variables(variables)
+    labels = [label for label, _ in variables]
+    columns = [column for _, column in variables]
+    values = df[columns].to_numpy(dtype=np.float64)
+
+    if entity_col is None:
+        table = pd.DataFrame(_block_statistics(values), columns=STAT_COLUMNS)
+        table.insert(0, "Variable", labels)
+        return table
+
+    # Sort once so every entity is a contiguous slice of the value array
+    codes, entities = pd.factorize(df[entity_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    values = values[order]
+    bounds = np.searchsorted(codes[order], np.arange(len(entities) + 1))
+
+    blocks = [
+        _block_statistics(values[start:end])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    table = pd.DataFrame(np.vstack(blocks), columns=STAT_COLUMNS)
+    table.insert(0, "Variable", labels * len(entities))
+    table.insert(0, entity_col, np.repeat(np.asarray(entities), len(labels)))
+    return table
+
+
+class RunningStats:
+    """
+    Streaming count/missing/mean/std/min/max for a fixed set of columns.
+
+    Feed chunks with update(); combine partial results from other workers
+    with merge(). Each update is vectorized across columns and uses Chan's
+    parallel form of Welford's algorithm, so the result matches a single
+    pass over the full data.
+    """
+
+    def __init__(self, n_columns):
+        self.count = np.zeros(n_columns)
+        self.missing = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values):
+        """Add a 2-D chunk (rows x columns) of observations."""
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        self.missing += values.shape[0] - count
+
+        filled = np.where(valid, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, filled.sum(axis=0) / count, 0.0)
+        m2 = (np.where(valid, values - mean, 0.0) ** 2).sum(axis=0)
+        chunk_min = np.where(valid, values, np.inf).min(axis=0)
+        chunk_max = np.where(valid, values, -np.inf).max(axis=0)
+        self._combine(count, mean, m2, chunk_min, chunk_max)
+        return self
+
+    def merge(self, other):
+        """Fold another RunningStats over the same columns into this one."""
+        self.missing += other.missing
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, count, mean, m2, chunk_min, chunk_max):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, count / total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta**2 * self.count * weight
+        self.count = total
+        self.min = np.minimum(self.min, chunk_min)
+        self.max = np.maximum(self.max, chunk_max)
+
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    def to_frame(self, labels):
+        """Summary table in the same layout as summarize() (quantiles are NaN)."""
+        empty = self.count == 0
+        table = pd.DataFrame(
+            {
+                "Variable": list(labels),
+                "Count": self.count,
+                "Missing": self.missing,
+                "Mean": np.where(empty, np.nan, self.mean),
+                "Std Dev": self.std,
+                "Min": np.where(empty, np.nan, self.min),
+                "25%": np.nan,
+                "Median": np.nan,
+                "75%": np.nan,
+                "Max": np.where(empty, np.nan, self.max),
+            }
+        )
+        return table
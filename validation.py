@@ -0,0 +1,306 @@
+"""
+Ingest Validation for the Downloaded FRED Frame
+Checks the raw frame from download_fred_data right after the download, so
+missing values, gaps, unit mismatches or a zero labor force are caught
+before the ratio computation, the 300-dpi charts and the regression run.
+
+Every check is a vectorized operation over whole columns and yields a
+boolean mask of offending rows (row checks) or a single verdict (frame
+checks). Checks have a severity:
+
+    error     the data must not reach the analysis
+    warning   reported, data passes
+
+The result is a machine-readable report (JSON-serializable dict). enforce()
+then either aborts with ValidationError, or quarantines: rows failing a row
+check are written aside and dropped, while frame errors still abort.
+
+Usage:
+    python validation.py heckscher_ohlin_data.csv --report validation.json
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ["Real_GDP", "Labor_Force", "Real_Investment", "Real_Exports"]
+
+# Unit sanity from ratios, so the bounds hold for economies of any size:
+# (label, numerator, denominator, multiplier, low, high)
+RATIO_BOUNDS = [
+    # Investment ($ billions) per worker (thousands) in dollars - fails when
+    # Labor_Force is in persons or millions instead of thousands
+    ("capital_labor_ratio", "Real_Investment", "Labor_Force", 1e6, 100.0, 1e6),
+    # Investment and exports in the same units as GDP
+    ("investment_share", "Real_Investment", "Real_GDP", 1.0, 0.01, 0.6),
+    ("export_share", "Real_Exports", "Real_GDP", 1.0, 0.001, 2.0),
+]
+
+# Annual log changes further than this many robust standard deviations
+# from the median are flagged as outliers
+OUTLIER_THRESHOLD = 6.0
+
+MODES = ["abort", "quarantine", "warn"]
+
+DEFAULT_QUARANTINE = "quarantine.csv"
+
+# Years listed per failed check in the report
+MAX_LISTED_ROWS = 20
+
+
+class ValidationError(ValueError):
+    """The data failed validation; the report is attached."""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def _years(df):
+    if "Year" in df.columns:
+        return df["Year"].to_numpy()
+    return df.index.to_numpy()
+
+
+def _entity_codes(df, entity_col):
+    if entity_col and entity_col in df.columns:
+        return pd.factorize(df[entity_col])[0]
+    return np.zeros(len(df), dtype=np.int64)
+
+
+def _row_checks(df, entity_col):
+    """(check, column, severity, mask) for every row-level check."""
+    checks = []
+    columns = [c for c in REQUIRED_COLUMNS if c in df.columns]
+    values = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+
+    missing = np.isnan(values)
+    non_positive = ~missing & (values <= 0)
+    for j, column in enumerate(columns):
+        checks.append(("missing", column, "error", missing[:, j]))
+        checks.append(("non_positive", column, "error", non_positive[:, j]))
+
+    frame = pd.DataFrame(values, columns=columns)
+    for label, numerator, denominator, multiplier, low, high in RATIO_BOUNDS:
+        if numerator not in frame or denominator not in frame:
+            continue
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = (
+                frame[numerator].to_numpy() * multiplier / frame[denominator].to_numpy()
+            )
+        out_of_range = np.isfinite(ratio) & ((ratio < low) | (ratio > high))
+        checks.append(
+            (f"unit_{label}", f"{numerator}/{denominator}", "error", out_of_range)
+        )
+
+    # Outliers in annual log changes, within each entity
+    codes = _entity_codes(df, entity_col)
+    same_entity = np.r_[False, codes[1:] == codes[:-1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(values > 0, values, np.nan))
+    changes = np.full_like(logs, np.nan)
+    changes[1:] = logs[1:] - logs[:-1]
+    changes[~same_entity] = np.nan
+    median = np.nanmedian(changes, axis=0) if len(df) > 2 else np.zeros(len(columns))
+    mad = np.nanmedian(np.abs(changes - median), axis=0) * 1.4826
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.abs(changes - median) / np.where(mad > 0, mad, np.nan)
+    outliers = np.nan_to_num(score, nan=0.0) > OUTLIER_THRESHOLD
+    for j, column in enumerate(columns):
+        checks.append(("outlier_change", column, "warning", outliers[:, j]))
+    return checks
+
+
+def _frame_checks(df, entity_col):
+    """(check, column, severity, passed, detail) for frame-level checks."""
+    checks = []
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    checks.append(
+        ("required_columns", None, "error", not missing, f"missing: {missing}")
+    )
+    non_numeric = [
+        c
+        for c in REQUIRED_COLUMNS
+        if c in df.columns and not pd.api.types.is_numeric_dtype(df[c])
+    ]
+    checks.append(
+        (
+            "numeric_columns",
+            None,
+            "error",
+            not non_numeric,
+            f"non-numeric: {non_numeric}",
+        )
+    )
+    checks.append(("not_empty", None, "error", len(df) > 0, f"{len(df)} rows"))
+
+    years = pd.to_numeric(pd.Series(_years(df)), errors="coerce").to_numpy()
+    integer_years = bool(np.isfinite(years).all() and (years == np.round(years)).all())
+    checks.append(
+        ("year_index_integer", "Year", "error", integer_years, "non-integer years")
+    )
+    if integer_years and len(years) > 1:
+        codes = _entity_codes(df, entity_col)
+        same_entity = codes[1:] == codes[:-1]
+        steps = np.diff(years)[same_entity]
+        checks.append(
+            (
+                "year_index_increasing",
+                "Year",
+                "error",
+                bool((steps > 0).all()),
+                f"{int((steps <= 0).sum())} non-increasing steps",
+            )
+        )
+        checks.append(
+            (
+                "year_gaps",
+                "Year",
+                "warning",
+                bool((steps <= 1).all()),
+                f"{int((steps > 1).sum())} gaps",
+            )
+        )
+    return checks
+
+
+def validate(df, entity_col="Entity"):
+    """
+    Run every check on a raw frame and return the report.
+
+    The report is a dict with status ("ok", "warning" or "error"), row and
+    error counts and one entry per failed check: check, column, severity,
+    count and the first failing years (row checks) or a detail message
+    (frame checks). Its "_error_rows" key holds the boolean mask of rows
+    failing any row-level error check, used by enforce().
+    """
+    failures = []
+    for check, column, severity, passed, detail in _frame_checks(df, entity_col):
+        if not passed:
+            failures.append(
+                {
+                    "check": check,
+                    "column": column,
+                    "severity": severity,
+                    "detail": detail,
+                }
+            )
+
+    error_rows = np.zeros(len(df), dtype=bool)
+    years = _years(df)
+    for check, column, severity, mask in _row_checks(df, entity_col):
+        count = int(mask.sum())
+        if not count:
+            continue
+        if severity == "error":
+            error_rows |= mask
+        failures.append(
+            {
+                "check": check,
+                "column": column,
+                "severity": severity,
+                "count": count,
+                "years": years[mask][:MAX_LISTED_ROWS].tolist(),
+            }
+        )
+
+    severities = {f["severity"] for f in failures}
+    status = "error" if "error" in severities else "warning" if severities else "ok"
+    return {
+        "status": status,
+        "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": len(df),
+        "error_rows": int(error_rows.sum()),
+        "frame_errors": sum(
+            f["severity"] == "error" and "count" not in f for f in failures
+        ),
+        "failures": failures,
+        "_error_rows": error_rows,
+    }
+
+
+def save_report(report, path):
+    public = {k: v for k, v in report.items() if not k.startswith("_")}
+    with open(path, "w") as f:
+        json.dump(public, f, indent=2)
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print(f"DATA VALIDATION: {report['status'].upper()} ({report['rows']} rows)")
+    print("=" * 70)
+    if not report["failures"]:
+        print("  ✓ All checks passed")
+    for failure in report["failures"]:
+        mark = "✗" if failure["severity"] == "error" else "!"
+        where = f" [{failure['column']}]" if failure["column"] else ""
+        if "count" in failure:
+            years = ", ".join(map(str, failure["years"]))
+            extra = "..." if failure["count"] > len(failure["years"]) else ""
+            detail = f"{failure['count']} rows ({years}{extra})"
+        else:
+            detail = failure["detail"]
+        print(f"  {mark} {failure['check']}{where}: {detail}")
+
+
+def enforce(df, report, mode="abort", quarantine_path=None):
+    """
+    Apply a validation report to df.
+
+    mode="abort" raises ValidationError on any error; "quarantine" drops
+    the rows failing row checks and returns the rest (frame errors, or
+    nothing left, still raise); "warn" only reports. Dropped years leave
+    gaps in the series. They are written to quarantine_path, or to
+    DEFAULT_QUARANTINE when rows were dropped and no path was given; an
+    explicit path is written on every quarantine run (just the header when
+    nothing fails), so it never holds rows from an earlier run.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    if mode == "warn" or (mode == "abort" and report["status"] != "error"):
+        return df
+    if mode == "abort" or report["frame_errors"]:
+        raise ValidationError(
+            f"Data validation failed: {report['error_rows']} rows, "
+            f"{report['frame_errors']} frame-level errors",
+            report,
+        )
+
+    bad = report["_error_rows"]
+    if bad.all():
+        raise ValidationError("Data validation failed: every row is invalid", report)
+    if bad.any() or quarantine_path is not None:
+        path = quarantine_path or DEFAULT_QUARANTINE
+        df[bad].to_csv(path)
+    if bad.any():
+        years = ", ".join(map(str, _years(df)[bad][:MAX_LISTED_ROWS]))
+        print(f"  ! {int(bad.sum())} rows quarantined to: {path} ({years})")
+        print("  ! The remaining series have gaps at these years")
+    return df[~bad]
+
+
+def validate_frame(df, mode="abort", report_path=None, quarantine_path=None):
+    """validate(), print and optionally save the report, then enforce()."""
+    report = validate(df)
+    print_report(report)
+    if report_path:
+        save_report(report, report_path)
+    return enforce(df, report, mode, quarantine_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("csv", nargs="?", default="heckscher_ohlin_data.csv")
+    parser.add_argument("--report", default="validation_report.json")
+    args = parser.parse_args()
+
+    report = validate(pd.read_csv(args.csv, index_col="Year"))
+    print_report(report)
+    save_report(report, args.report)
+    print(f"\n✓ Report saved to: {args.report}")
+    raise SystemExit(1 if report["status"] == "error" else 0)